@@ -1,22 +1,39 @@
+import os
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from config import Config
-from flask_migrate import Migrate
 from flask_cors import CORS
 
 # SQLAlchemy instance
 db = SQLAlchemy()
-migrate = Migrate() 
 
 def create_app():
     app = Flask(__name__)
     app.config.from_object(Config)
 
+    # Di belakang reverse proxy, request.remote_addr adalah alamat proxy
+    if Config.TRUSTED_PROXY_COUNT:
+        from werkzeug.middleware.proxy_fix import ProxyFix
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=Config.TRUSTED_PROXY_COUNT,
+                                x_proto=Config.TRUSTED_PROXY_COUNT)
+
     db.init_app(app)
-    migrate.init_app(app, db) 
 
-    from app.routes import main_bp
+    # Flask-Migrate (alembic) hanya dibutuhkan perintah `flask db`; Flask CLI
+    # men-set FLASK_RUN_FROM_CLI sebelum app dibuat, gunicorn/run.py tidak
+    if os.environ.get("FLASK_RUN_FROM_CLI"):
+        from flask_migrate import Migrate
+        from app.commands import register_commands
+        Migrate(app, db)
+        register_commands(app)
+
+    from app.routes import main_bp, metrics_bp
+    from app.helpers.metrics import init_request_metrics
     app.register_blueprint(main_bp)
+    # /metrics di port API publik hanya aktif dengan token
+    if Config.METRICS_TOKEN:
+        app.register_blueprint(metrics_bp)
+    init_request_metrics(app)
     
     CORS(app)
 
@@ -0,0 +1,17 @@
+import click
+
+
+def register_commands(app):
+    """
+    Perintah `flask ...` untuk pemeliharaan data. Modul berat baru di-import
+    saat perintahnya dijalankan.
+    """
+
+    @app.cli.command("backfill-coordinates")
+    @click.option("--batch-size", default=1000, show_default=True, help="Jumlah user per commit.")
+    def backfill_coordinates(batch_size):
+        """Isi latitude/longitude user lama dari kolom string lat/lang."""
+        from app.utils.geo_index import backfill_user_coordinates
+
+        updated = backfill_user_coordinates(batch_size=batch_size)
+        click.echo(f"Backfilled coordinates for {updated} user(s).")
@@ -1,10 +1,26 @@
+import uuid
 from flask import jsonify
-from werkzeug.security import check_password_hash
-from app.models import User
+from datetime import datetime, timedelta
+from app import db
+from app.models import User, Token
 from app.helpers.jwt import create_jwt_token
+from app.helpers.password import get_password_hasher, PasswordHasherBusy
+from app.helpers.throttle import login_ip_limiter, login_account_limiter
+from app.helpers.token_cache import token_digest, revoke_digests
+from config import Config
 
 
-def login_user(data):
+def _throttled(retry_after):
+    response = jsonify({
+        "error": True,
+        "message": "Too many login attempts. Please try again later.",
+        "data": {"retry_after": int(retry_after) + 1}
+    })
+    response.headers["Retry-After"] = str(int(retry_after) + 1)
+    return response, 429
+
+
+def login_user(data, ip=None):
     try:
         email = data.get('email')
         password = data.get('password')
@@ -17,21 +33,45 @@ def login_user(data):
                 "data": None
             }), 400
 
+        account_key = email.strip().lower()
+        retry_after = max(login_ip_limiter.retry_after(ip), login_account_limiter.retry_after(account_key))
+        if retry_after:
+            return _throttled(retry_after)
+        login_ip_limiter.hit(ip)
+
         user = User.query.filter_by(email=email).first()
-        if not user or not check_password_hash(user.password, password):
+        password_hash = user.password if user else None
+        # Lepas koneksi database selama hashing
+        db.session.rollback()
+
+        hasher = get_password_hasher()
+        if not hasher.verify(password_hash, password):
+            login_account_limiter.hit(account_key)
             return jsonify({
                 "error": True,
                 "message": "Invalid email or password.",
                 "data": None
             }), 401
+        login_account_limiter.reset(account_key)
+
+        # Upgrade hash lama ke method/cost yang dikonfigurasi
+        if hasher.needs_rehash(password_hash):
+            user.password = hasher.hash(password)
 
         # Simpan atau perbarui FCM token
         if fcm_token:
             user.fcm_token = fcm_token
-            db.session.commit()
 
         token = create_jwt_token(str(user.id), user.role.name)
 
+        # Catat token (sebagai digest) agar bisa di-revoke
+        db.session.add(Token(
+            token=token_digest(token),
+            user_id=user.id,
+            expires_at=datetime.utcnow() + timedelta(hours=Config.JWT_EXPIRES_HOURS),
+        ))
+        db.session.commit()
+
         return jsonify({
             "error": False,
             "message": "Login successful.",
@@ -41,9 +81,63 @@ def login_user(data):
             }
         }), 200
 
+    except PasswordHasherBusy:
+        return jsonify({
+            "error": True,
+            "message": "Server is busy. Please try again.",
+            "data": None
+        }), 503
     except Exception as e:
+        db.session.rollback()
         return jsonify({
             "error": True,
             "message": "An error occurred while processing the login request.",
             "data": {"details": str(e)} 
         }), 500
+
+
+def logout_user(token, user, revoke_all=False):
+    """
+    Me-revoke token yang sedang dipakai, atau semua token milik user jika
+    revoke_all. Token yang di-revoke langsung ditolak oleh proses ini dan
+    oleh proses lain setelah index revokasinya di-refresh.
+    """
+    try:
+        now = datetime.utcnow()
+        digest = token_digest(token)
+        digests = [digest]
+
+        current = Token.query.filter_by(token=digest).first()
+        if current is None:
+            # Token yang dibuat sebelum pencatatan token
+            exp = user.get("exp")
+            current = Token(
+                token=digest,
+                user_id=uuid.UUID(user["id"]),
+                expires_at=datetime.utcfromtimestamp(exp) if exp else None,
+            )
+            db.session.add(current)
+        current.revoked_at = now
+
+        if revoke_all:
+            active = Token.query.filter(Token.user_id == current.user_id, Token.revoked_at.is_(None)).all()
+            for active_token in active:
+                active_token.revoked_at = now
+                digests.append(active_token.token)
+
+        db.session.commit()
+        revoke_digests(digests)
+
+        return jsonify({
+            "error": False,
+            "message": "Logout successful.",
+            "data": {"revoked": len(digests)}
+        }), 200
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            "error": True,
+            "message": "An error occurred while processing the logout request.",
+            "data": {"details": str(e)}
+        }), 500
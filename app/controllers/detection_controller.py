@@ -2,18 +2,20 @@
 # app/controllers/detection_controller
 
 from app import db
-from math import radians
-from sqlalchemy import func
-from app.models import User,CCTV, Predict, Images, ResultPredict, StatusEnum,RoleEnum
-from flask import request, jsonify
-from sqlalchemy.orm import joinedload
+from app.models import User,CCTV, Predict, Images, ResultPredict, StatusEnum,RoleEnum, OutboxEvent
+from flask import request, jsonify, Response
+from sqlalchemy import insert
+from app.helpers.ids import as_uuid
 from app.helpers.logger import setup_logger
-from app.utils.kafka_utils import produce_event
+from app.utils.outbox_relay import outbox_row, wake_outbox_relay
+from app.utils.event_codec import ENCODING_JSON, encode_body, encode_event, resolve_encoding
+from app.helpers.metrics import REPORT_CREATE_SECONDS
+from app.utils.geo_index import find_nearest_police, find_police_in_radius
+from app.utils.reference_cache import cctv_owner_cache, owner_profile_cache, owner_profile_from_user
+from config import Config
 from sqlalchemy.exc import SQLAlchemyError
-import math
-from sqlalchemy import Float
 from datetime import datetime
-import json
+import uuid
 
 
 
@@ -21,129 +23,193 @@ logger = setup_logger("detection")
 
 
 def get_owner_id_by_cctv_ip(cctv_ip):
+    owner_id = cctv_owner_cache.get(cctv_ip)
+    if owner_id is not None:
+        return owner_id
+
+    try:
+        owner_id = db.session.query(CCTV.user_id).filter_by(cctv_ip=cctv_ip).scalar()
+        if owner_id is not None:
+            cctv_owner_cache.set(cctv_ip, owner_id)
+        return owner_id
+    except Exception as e:
+        logger.error(f"Error retrieving owner ID for CCTV {cctv_ip}: {e}")
+        return None
+
+
+def get_owner_profiles(owner_ids):
+    """
+    Mengambil profil OWNER (nama, alamat, koordinat) dari cache; yang belum
+    ada di cache diambil dengan satu query.
+    """
+    profiles, missing = {}, []
+    for owner_id in owner_ids:
+        profile = owner_profile_cache.get(owner_id)
+        if profile is None:
+            missing.append(owner_id)
+        else:
+            profiles[owner_id] = profile
+
+    if missing:
+        owners = db.session.query(User).filter(User.id.in_(missing), User.role == RoleEnum.OWNER)
+        for owner in owners:
+            profile = owner_profile_from_user(owner)
+            owner_profile_cache.set(owner.id, profile)
+            profiles[owner.id] = profile
+    return profiles
+
+
+def get_active_cctvs():
+    """
+    Mengambil semua CCTV yang terdaftar sebagai mapping cctv_ip -> owner_id.
+    """
     try:
-        cctv = db.session.query(CCTV).options(joinedload(CCTV.user)).filter_by(cctv_ip=cctv_ip).first()
-        
-        if not cctv:
-            return None
-        return cctv.user_id
+        rows = db.session.query(CCTV.cctv_ip, CCTV.user_id).all()
+        return {row.cctv_ip: row.user_id for row in rows}
     except Exception as e:
-        print(f"Error retrieving owner ID: {e}")
+        logger.error(f"Error retrieving CCTV list: {e}")
         return None
+    finally:
+        db.session.remove()
     
     
 def create_report(owner_id, array_image, description):
+    result = create_reports([{
+        "owner_id": owner_id,
+        "images": array_image,
+        "description": description,
+    }])[0]
+
+    if "error" in result:
+        return jsonify({"error": result["error"]}), result["status"]
+    # Jika event juga JSON, body event dipakai ulang tanpa serialize ulang
+    if result["report_encoding"] == ENCODING_JSON:
+        report_json = result["report_body"]
+    else:
+        report_json = encode_body(result["report"], ENCODING_JSON)
+    body = b'{"success":true,"report":' + report_json + b"}"
+    return Response(body, status=201, mimetype="application/json")
+
+
+def _report_error(message, status):
+    return {"error": message, "status": status}
+
+
+def create_reports(items):
+    with REPORT_CREATE_SECONDS.time():
+        return _create_reports(items)
+
+
+def _create_reports(items):
+    """
+    Membuat banyak laporan (mis. dari beberapa kamera sekaligus) dalam satu
+    transaksi. Setiap item berisi owner_id, images dan description.
+    Predict, Images dan ResultPredict di-insert secara bulk dengan ID yang
+    dibuat di sisi aplikasi, lalu di-commit sekali.
+
+    Mengembalikan list hasil sesuai urutan item: {"report": {...},
+    "report_body": <bytes>, "report_encoding": <encoding>} atau
+    {"error": "...", "status": <http status>}. report_body adalah laporan
+    yang di-serialize sekali dengan EVENT_ENCODING untuk body event.
+    """
+    results = [None] * len(items)
     try:
-        logger.info("Starting to create report...")
-
-        if not owner_id or not array_image or not description:
-            logger.error("Invalid input: Missing required fields.")
-            return jsonify({"error": "Invalid input, all fields are required"}), 400
-
-        # Cari user dengan role OWNER
-        logger.info(f"Fetching owner with ID: {owner_id}")
-        owner = db.session.query(User).filter(User.id == owner_id, User.role == RoleEnum.OWNER).first()
-        if not owner or not owner.lat or not owner.lang:
-            logger.error("Owner not found or coordinates missing.")
-            return jsonify({"error": "Owner not found or invalid coordinates"}), 404
-
-        # Ambil nilai koordinat OWNER
-        owner_lat = float(owner.lat)
-        owner_lang = float(owner.lang)
-        logger.info(f"Owner coordinates: lat={owner_lat}, lang={owner_lang}")
-
-        # Cari POLICE dalam radius 20 km menggunakan SQLAlchemy func
-        logger.info("Finding nearby police within 20km radius...")
-        nearby_police = db.session.query(
-            User.id,
-            User.name,
-            (6371 * func.acos(
-                func.cos(func.radians(owner_lat)) * func.cos(func.radians(User.lat.cast(Float))) *
-                func.cos(func.radians(User.lang.cast(Float)) - func.radians(owner_lang)) +
-                func.sin(func.radians(owner_lat)) * func.sin(func.radians(User.lat.cast(Float)))
-            )).label("distance")
-        ).filter(
-            User.role == RoleEnum.POLICE,
-            User.lat.isnot(None),
-            User.lang.isnot(None),
-            (6371 * func.acos(
-                func.cos(func.radians(owner_lat)) * func.cos(func.radians(User.lat.cast(Float))) *
-                func.cos(func.radians(User.lang.cast(Float)) - func.radians(owner_lang)) +
-                func.sin(func.radians(owner_lat)) * func.sin(func.radians(User.lat.cast(Float)))
-            )) <= 20
-        ).all()
-
-        if not nearby_police:
-            logger.warning("No police found within 20km radius.")
-            return jsonify({"error": "No police found within 20km radius"}), 404
-
-        # Buat laporan Predict
-        logger.info("Creating predict entry...")
-        predict = Predict(deskripsi=f"Telah terjadi perampokan di {owner.address} dari korban {owner.name}")
-        db.session.add(predict)
-        db.session.commit()
-        logger.info(f"Predict entry created with ID: {predict.id}")
-
-        # Simpan array image ke tabel Images
-        logger.info("Saving images...")
-        for image_name in array_image:
-            image = Images(name_image=image_name, predict_id=predict.id)
-            db.session.add(image)
-        db.session.commit()
-        logger.info("Images saved successfully.")
-
-        # Buat ResultPredict
-        logger.info("Creating ResultPredict entry...")
-        result_predict = ResultPredict(
-            user_id=owner.id,
-            predict_id=predict.id,
-            status=StatusEnum.PENDING
-        )
-        db.session.add(result_predict)
-        db.session.commit()
-        logger.info(f"ResultPredict entry created with ID: {result_predict.id}")
-
-        # Laporan akhir
-        logger.info("Building final report...")
-        report = {
-            "report_id": str(predict.id),
-            "owner_id": str(owner.id),
-            "address": str(owner.address),
-            "description": description,
-            "images": array_image,
-            "created_at": datetime.now().isoformat(),
-            "police_in_radius": [
-                {"id": str(police.id), "name": police.name, "distance_km": round(police.distance, 2)}
-                for police in nearby_police
-            ]
-        }
-        produce_event("knife-detection-notifications", key="alert", value=json.dumps({
-            "user_id": str(owner.id), 
-            "report": {
-                "report_id": str(predict.id), 
-                "owner_id": str(owner.id), 
+        logger.info(f"Starting to create {len(items)} report(s)...")
+
+        owner_ids = {as_uuid(item.get("owner_id")) for item in items} - {None}
+        owners = get_owner_profiles(owner_ids)
+
+        radius_km = Config.POLICE_SEARCH_RADIUS_KM
+        predict_rows, image_rows, result_rows, reports = [], [], [], []
+
+        for i, item in enumerate(items):
+            owner_id, array_image, description = item.get("owner_id"), item.get("images"), item.get("description")
+            if not owner_id or not array_image or not description:
+                logger.error("Invalid input: Missing required fields.")
+                results[i] = _report_error("Invalid input, all fields are required", 400)
+                continue
+
+            owner = owners.get(as_uuid(owner_id))
+            if not owner or owner.latitude is None or owner.longitude is None:
+                logger.error(f"Owner {owner_id} not found or coordinates missing.")
+                results[i] = _report_error("Owner not found or invalid coordinates", 404)
+                continue
+
+            # Cari POLICE dalam radius lewat spatial index; dengan POLICE_NOTIFY_MAX
+            # hanya k polisi terdekat di dalam radius yang dilaporkan
+            if Config.POLICE_NOTIFY_MAX:
+                nearby_police = find_nearest_police(owner.latitude, owner.longitude,
+                                                    Config.POLICE_NOTIFY_MAX, max_radius_km=radius_km)
+            else:
+                nearby_police = find_police_in_radius(owner.latitude, owner.longitude, radius_km)
+            if not nearby_police:
+                logger.warning(f"No police found within {radius_km}km radius of owner {owner_id}.")
+                results[i] = _report_error(f"No police found within {radius_km}km radius", 404)
+                continue
+
+            predict_id = uuid.uuid4()
+            predict_rows.append({
+                "id": predict_id,
+                "deskripsi": f"Telah terjadi perampokan di {owner.address} dari korban {owner.name}",
+            })
+            image_rows.extend(
+                {"id": uuid.uuid4(), "name_image": image_name, "predict_id": predict_id}
+                for image_name in array_image
+            )
+            result_rows.append({
+                "id": uuid.uuid4(),
+                "user_id": owner.id,
+                "predict_id": predict_id,
+                "status": StatusEnum.PENDING,
+            })
+            results[i] = {"report": {
+                "report_id": str(predict_id),
+                "owner_id": str(owner.id),
                 "address": str(owner.address),
                 "description": description,
-                "images": array_image,
+                "images": list(array_image),
                 "created_at": datetime.now().isoformat(),
                 "police_in_radius": [
                     {"id": str(police.id), "name": police.name, "distance_km": round(police.distance, 2)}
                     for police in nearby_police
                 ]
-            }
-        }))
-
-        logger.info("Report sent to Kafka successfully.")
+            }}
+            reports.append(results[i]["report"])
+
+        if not reports:
+            return results
+
+        # Event notifikasi ditulis ke outbox di transaksi yang sama, dikirim oleh OutboxRelay
+        encoding = resolve_encoding()
+        outbox_rows = []
+        for result in results:
+            if not result or "report" not in result:
+                continue
+            report = result["report"]
+            result["report_body"] = encode_body(report, encoding)
+            result["report_encoding"] = encoding
+            event_id = uuid.uuid4()
+            outbox_rows.append(outbox_row(Config.TOPIC_NAME, report["owner_id"], encode_event(
+                event_id, report["owner_id"], report["report_id"], result["report_body"], encoding,
+            ), event_id=event_id))
+
+        # Satu transaksi: insert bulk Predict, Images, ResultPredict, OutboxEvent lalu commit sekali
+        logger.info(f"Saving {len(predict_rows)} predict(s) with {len(image_rows)} image(s)...")
+        db.session.execute(insert(Predict), predict_rows)
+        db.session.execute(insert(Images), image_rows)
+        db.session.execute(insert(ResultPredict), result_rows)
+        db.session.execute(insert(OutboxEvent), outbox_rows)
+        db.session.commit()
+        wake_outbox_relay()
+        logger.info("Reports saved successfully.")
 
-        logger.info("Report created successfully.")
-        return jsonify({"success": True, "report": report}), 201
+        return results
 
     except SQLAlchemyError as e:
         logger.error(f"Database error occurred: {str(e)}")
         db.session.rollback()
-        return jsonify({"error": "Database error occurred"}), 500
+        return [_report_error("Database error occurred", 500)] * len(items)
     except Exception as e:
         logger.error(f"An unexpected error occurred: {str(e)}")
         db.session.rollback()
-        return jsonify({"error": "An unexpected error occurred"}), 500
-   
\ No newline at end of file
+        return [_report_error("An unexpected error occurred", 500)] * len(items)
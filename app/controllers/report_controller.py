@@ -0,0 +1,180 @@
+import base64
+import uuid
+from datetime import datetime
+from flask import jsonify
+from sqlalchemy import select, tuple_
+from sqlalchemy.exc import SQLAlchemyError
+from app import db
+from app.models import Images, Predict, ResultPredict, StatusEnum, User
+from app.helpers.logger import setup_logger
+from config import Config
+
+logger = setup_logger("report_feed")
+
+
+def _error(message, status):
+    return jsonify({
+        "error": True,
+        "message": message,
+        "data": None
+    }), status
+
+
+def encode_cursor(created_at, report_id):
+    raw = f"{created_at.isoformat()}|{report_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, report_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), uuid.UUID(report_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor.")
+
+
+def _page_size(value):
+    if value in (None, ""):
+        return Config.REPORTS_PAGE_SIZE
+    try:
+        limit = int(value)
+    except ValueError:
+        raise ValueError("limit must be an integer.")
+    if limit < 1:
+        raise ValueError("limit must be greater than 0.")
+    return min(limit, Config.REPORTS_MAX_PAGE_SIZE)
+
+
+def _status(value):
+    try:
+        return StatusEnum(value.upper())
+    except ValueError:
+        raise ValueError(f"Invalid status '{value}'.")
+
+
+def _report_query():
+    return (
+        select(
+            ResultPredict.id,
+            ResultPredict.predict_id,
+            ResultPredict.user_id,
+            ResultPredict.status,
+            ResultPredict.created_at,
+            Predict.deskripsi,
+            User.name,
+            User.address,
+        )
+        .join(Predict, Predict.id == ResultPredict.predict_id)
+        .join(User, User.id == ResultPredict.user_id)
+    )
+
+
+def _load_images(predict_ids):
+    """
+    Semua gambar untuk satu halaman laporan dalam satu query (predict_id IN ...).
+    """
+    images = {predict_id: [] for predict_id in predict_ids}
+    if not predict_ids:
+        return images
+    rows = db.session.execute(
+        select(Images.predict_id, Images.name_image)
+        .where(Images.predict_id.in_(predict_ids))
+        .order_by(Images.predict_id, Images.created_at)
+    )
+    for predict_id, name_image in rows:
+        images[predict_id].append(name_image)
+    return images
+
+
+def _serialize(row, images):
+    return {
+        "report_id": str(row.predict_id),
+        "result_id": str(row.id),
+        "status": row.status.value,
+        "description": row.deskripsi,
+        "owner": {
+            "id": str(row.user_id),
+            "name": row.name,
+            "address": row.address,
+        },
+        "images": images.get(row.predict_id, []),
+        "created_at": row.created_at.isoformat() if row.created_at else None,
+    }
+
+
+def list_reports(user, args):
+    """
+    Feed laporan terbaru dengan keyset pagination pada (created_at, id).
+    OWNER hanya melihat laporannya sendiri; POLICE melihat semua laporan dan
+    boleh memfilter dengan owner_id. Filter status opsional.
+    """
+    try:
+        limit = _page_size(args.get("limit"))
+        query = _report_query()
+
+        if user["role"] == "OWNER":
+            query = query.where(ResultPredict.user_id == uuid.UUID(user["id"]))
+        elif args.get("owner_id"):
+            try:
+                query = query.where(ResultPredict.user_id == uuid.UUID(args["owner_id"]))
+            except ValueError:
+                raise ValueError("Invalid owner_id.")
+
+        if args.get("status"):
+            query = query.where(ResultPredict.status == _status(args["status"]))
+
+        if args.get("cursor"):
+            created_at, report_id = decode_cursor(args["cursor"])
+            query = query.where(tuple_(ResultPredict.created_at, ResultPredict.id) < (created_at, report_id))
+
+        # Ambil satu baris lebih untuk mengetahui apakah masih ada halaman berikutnya
+        rows = db.session.execute(
+            query.order_by(ResultPredict.created_at.desc(), ResultPredict.id.desc()).limit(limit + 1)
+        ).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        images = _load_images([row.predict_id for row in rows])
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id) if has_more else None
+
+        return jsonify({
+            "error": False,
+            "message": "Reports retrieved successfully.",
+            "data": {
+                "reports": [_serialize(row, images) for row in rows],
+                "next_cursor": next_cursor,
+            }
+        }), 200
+
+    except ValueError as e:
+        return _error(str(e), 400)
+    except SQLAlchemyError as e:
+        logger.error(f"Database error while listing reports: {e}")
+        return _error("Database error occurred", 500)
+
+
+def get_report(user, report_id):
+    try:
+        try:
+            predict_id = uuid.UUID(report_id)
+        except ValueError:
+            return _error("Invalid report id.", 400)
+
+        query = _report_query().where(ResultPredict.predict_id == predict_id)
+        if user["role"] == "OWNER":
+            query = query.where(ResultPredict.user_id == uuid.UUID(user["id"]))
+
+        row = db.session.execute(query).first()
+        if row is None:
+            return _error("Report not found.", 404)
+
+        return jsonify({
+            "error": False,
+            "message": "Report retrieved successfully.",
+            "data": _serialize(row, _load_images([row.predict_id]))
+        }), 200
+
+    except SQLAlchemyError as e:
+        logger.error(f"Database error while fetching report {report_id}: {e}")
+        return _error("Database error occurred", 500)
@@ -0,0 +1,12 @@
+import uuid
+
+
+def as_uuid(value):
+    """
+    UUID dari objek UUID atau string (mis. claim JWT, key event), atau None
+    jika nilainya bukan UUID yang valid.
+    """
+    try:
+        return value if isinstance(value, uuid.UUID) else uuid.UUID(str(value))
+    except (TypeError, ValueError):
+        return None
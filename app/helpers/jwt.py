@@ -1,12 +1,18 @@
 import jwt
+import uuid
 from datetime import datetime, timedelta
 from config import Config
 
 def create_jwt_token(user_id, role):
+    now = datetime.utcnow()
     payload = {
         "id": user_id,
         "role": role,
-        "exp": datetime.utcnow() + timedelta(hours=24)  
+        # jti membuat setiap login menghasilkan token (dan digest) yang unik,
+        # walaupun user yang sama login beberapa kali dalam detik yang sama
+        "jti": uuid.uuid4().hex,
+        "iat": now,
+        "exp": now + timedelta(hours=Config.JWT_EXPIRES_HOURS)
     }
     token = jwt.encode(payload, Config.JWT_SECRET_KEY, algorithm=Config.JWT_ALGORITHM)
     return token
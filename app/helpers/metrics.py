@@ -0,0 +1,138 @@
+"""
+Metric Prometheus untuk semua peran proses, memakai prometheus_client.
+
+Detector dan notifier adalah satu proses dan memakai registry default.
+API berjalan dengan beberapa worker gunicorn; gunicorn.conf.py men-set
+PROMETHEUS_MULTIPROC_DIR sehingga setiap worker menulis nilainya ke file
+dan /metrics menggabungkan semua worker (lihat render_metrics).
+"""
+import os
+import time
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, generate_latest
+from prometheus_client import Counter, Gauge, Histogram
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = CONTENT_TYPE_LATEST
+
+
+def counter(name, documentation, labelnames=()):
+    return Counter(name, documentation, labelnames)
+
+
+def gauge(name, documentation, labelnames=(), multiprocess_mode="all"):
+    # Gauge dengan set_function hanya terbaca di mode satu proses
+    return Gauge(name, documentation, labelnames, multiprocess_mode=multiprocess_mode)
+
+
+def histogram(name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+    return Histogram(name, documentation, labelnames, buckets=buckets)
+
+
+# Detector
+DETECTOR_STAGE_SECONDS = histogram(
+    "detector_stage_seconds", "Latency of each detection pipeline stage.", ["stage"])
+DETECTOR_FRAMES_READ = counter(
+    "detector_frames_read_total", "Frames read from the camera stream.", ["camera"])
+DETECTOR_FRAMES_DROPPED = counter(
+    "detector_frames_dropped_total", "Frames overwritten before the detector consumed them.", ["camera"])
+DETECTOR_FRAMES_SKIPPED = counter(
+    "detector_frames_skipped_total", "Frames skipped by the motion gate.", ["camera"])
+DETECTOR_FRAMES_INFERRED = counter(
+    "detector_frames_inferred_total", "Frames run through the detection model.", ["camera"])
+DETECTOR_DETECTIONS = counter(
+    "detector_detections_total", "Detections accepted by the post-processing filter.", ["camera"])
+DETECTOR_FRAME_LAG_SECONDS = gauge(
+    "detector_frame_lag_seconds", "Age of the last processed frame when inference finished.", ["camera"],
+    multiprocess_mode="livemax")
+DETECTOR_UPLOADS = counter(
+    "detector_uploads_total", "Evidence image uploads by result.", ["result"])
+DETECTOR_QUEUE_DEPTH = gauge(
+    "detector_queue_depth", "Items waiting in detector queues.", ["queue"], multiprocess_mode="livesum")
+
+# Reports & API
+REPORT_CREATE_SECONDS = histogram(
+    "report_create_seconds", "Time spent in create_report.")
+HTTP_REQUEST_SECONDS = histogram(
+    "http_request_seconds", "HTTP request latency.", ["method", "endpoint", "status"])
+
+# Kafka
+KAFKA_MESSAGES_PRODUCED = counter(
+    "kafka_messages_produced_total", "Kafka messages by delivery result.", ["topic", "result"])
+KAFKA_DELIVERY_SECONDS = histogram(
+    "kafka_delivery_seconds", "Time from produce() to broker acknowledgement.")
+KAFKA_PRODUCER_QUEUE_DEPTH = gauge(
+    "kafka_producer_queue_depth", "Messages waiting in the producer queue or in flight.", multiprocess_mode="livesum")
+KAFKA_MESSAGES_CONSUMED = counter(
+    "kafka_messages_consumed_total", "Kafka messages by handling result.", ["topic", "result"])
+KAFKA_CONSUMER_BATCH_SECONDS = histogram(
+    "kafka_consumer_batch_seconds", "Time to handle and commit one consumed batch.")
+KAFKA_CONSUMER_LAG = gauge(
+    "kafka_consumer_lag", "Messages between the consumer position and the partition high watermark.",
+    ["topic", "partition"], multiprocess_mode="livemax")
+PASSWORD_HASH_SECONDS = histogram(
+    "password_hash_seconds", "Time spent hashing or verifying passwords.", ["operation"])
+AUTH_TOKEN_CACHE = counter(
+    "auth_token_cache_total", "Verified-token cache lookups in authenticate.", ["result"])
+
+# Outbox
+OUTBOX_EVENTS = counter(
+    "outbox_events_total", "Outbox events handled by the relay, by result.", ["result"])
+OUTBOX_OLDEST_EVENT_AGE_SECONDS = gauge(
+    "outbox_oldest_event_age_seconds", "Age of the oldest event in the last relay batch.",
+    multiprocess_mode="livemax")
+
+# Notifications
+NOTIFICATIONS_SENT = counter(
+    "notifications_sent_total", "FCM notifications by audience and result.", ["audience", "result"])
+NOTIFICATION_TOKENS_PRUNED = counter(
+    "notification_tokens_pruned_total", "FCM tokens removed after FCM reported them invalid.")
+
+
+def init_request_metrics(app):
+    """
+    Mencatat latency setiap request HTTP ke HTTP_REQUEST_SECONDS.
+    """
+    from flask import g, request
+
+    @app.before_request
+    def _start_timer():
+        g._metrics_started = time.perf_counter()
+
+    @app.after_request
+    def _record_latency(response):
+        started = getattr(g, "_metrics_started", None)
+        if started is not None:
+            HTTP_REQUEST_SECONDS.labels(
+                method=request.method,
+                endpoint=request.endpoint or "unknown",
+                status=response.status_code,
+            ).observe(time.perf_counter() - started)
+        return response
+
+
+def render_metrics():
+    """
+    Exposition format untuk proses ini. Jika PROMETHEUS_MULTIPROC_DIR di-set
+    (worker gunicorn), nilai dari semua worker digabung sehingga setiap scrape
+    mengembalikan series yang sama, bukan milik worker yang kebetulan menjawab.
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
+
+def metrics_wsgi_app(environ, start_response):
+    """
+    WSGI app yang hanya melayani /metrics, untuk proses tanpa API (detector,
+    notifier) agar endpoint API tidak ikut terekspos di port metrics.
+    """
+    if environ.get("PATH_INFO") != "/metrics":
+        start_response("404 Not Found", [("Content-Type", "text/plain")])
+        return [b"Not Found\n"]
+    body = render_metrics()
+    start_response("200 OK", [("Content-Type", CONTENT_TYPE), ("Content-Length", str(len(body)))])
+    return [body]
@@ -0,0 +1,71 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.security import check_password_hash, generate_password_hash
+from config import Config
+from app.helpers.metrics import PASSWORD_HASH_SECONDS
+
+
+class PasswordHasherBusy(Exception):
+    """
+    Semua worker hashing sibuk dan antrian penuh.
+    """
+
+
+class PasswordHasher:
+    """
+    Verifikasi dan pembuatan hash password di worker pool terbatas agar
+    request thread tidak memonopoli CPU. hashlib melepas GIL selama
+    scrypt/pbkdf2, jadi worker berjalan paralel di beberapa core.
+    Jumlah pekerjaan yang menunggu dibatasi; jika penuh, PasswordHasherBusy.
+    """
+
+    def __init__(self, method=None, workers=None, max_pending=None, queue_timeout=None):
+        self.method = method or Config.PASSWORD_HASH_METHOD
+        self.workers = workers or Config.PASSWORD_HASH_WORKERS or os.cpu_count() or 1
+        self.queue_timeout = Config.PASSWORD_HASH_QUEUE_TIMEOUT if queue_timeout is None else queue_timeout
+        self._slots = threading.BoundedSemaphore(self.workers + (max_pending or Config.PASSWORD_HASH_MAX_PENDING))
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+        # Hash pembanding untuk email yang tidak terdaftar, dan prefix method kanonik
+        self._dummy_hash = generate_password_hash(os.urandom(16).hex(), method=self.method)
+        self.method_prefix = self._dummy_hash.split("$", 1)[0]
+
+    def _run(self, operation, fn, *args):
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            raise PasswordHasherBusy()
+        try:
+            def timed():
+                with PASSWORD_HASH_SECONDS.labels(operation=operation).time():
+                    return fn(*args)
+            return self._executor.submit(timed).result()
+        finally:
+            self._slots.release()
+
+    def verify(self, password_hash, password):
+        """
+        password_hash None (user tidak ditemukan) tetap diverifikasi terhadap
+        hash dummy agar waktu responsnya sama.
+        """
+        if password_hash is None:
+            self._run("verify", check_password_hash, self._dummy_hash, password)
+            return False
+        return self._run("verify", check_password_hash, password_hash, password)
+
+    def hash(self, password):
+        return self._run("hash", generate_password_hash, password, self.method)
+
+    def needs_rehash(self, password_hash):
+        return password_hash.split("$", 1)[0] != self.method_prefix
+
+
+_hasher = None
+_hasher_lock = threading.Lock()
+
+
+def get_password_hasher():
+    global _hasher
+    if _hasher is None:
+        with _hasher_lock:
+            if _hasher is None:
+                _hasher = PasswordHasher()
+    return _hasher
@@ -0,0 +1,57 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from config import Config
+
+
+class SlidingWindowLimiter:
+    """
+    Membatasi jumlah kejadian per key dalam jendela waktu (detik).
+    Jumlah key dibatasi secara LRU agar memori tetap terbatas.
+    """
+
+    def __init__(self, limit, window, maxsize=None):
+        self.limit = limit
+        self.window = window
+        self.maxsize = maxsize or Config.LOGIN_THROTTLE_MAX_KEYS
+        self._hits = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _prune(self, hits, now):
+        while hits and hits[0] <= now - self.window:
+            hits.popleft()
+
+    def retry_after(self, key):
+        """
+        Detik sampai key boleh mencoba lagi, 0 jika tidak diblokir.
+        """
+        now = time.monotonic()
+        with self._lock:
+            hits = self._hits.get(key)
+            if not hits:
+                return 0
+            self._prune(hits, now)
+            if len(hits) < self.limit:
+                return 0
+            return hits[0] + self.window - now
+
+    def hit(self, key):
+        now = time.monotonic()
+        with self._lock:
+            hits = self._hits.get(key)
+            if hits is None:
+                hits = self._hits[key] = deque()
+            self._hits.move_to_end(key)
+            self._prune(hits, now)
+            hits.append(now)
+            while len(self._hits) > self.maxsize:
+                self._hits.popitem(last=False)
+
+    def reset(self, key):
+        with self._lock:
+            self._hits.pop(key, None)
+
+
+# Semua percobaan login per IP, dan login gagal per akun
+login_ip_limiter = SlidingWindowLimiter(Config.LOGIN_IP_MAX_ATTEMPTS, Config.LOGIN_IP_WINDOW_SECONDS)
+login_account_limiter = SlidingWindowLimiter(Config.LOGIN_ACCOUNT_MAX_FAILURES, Config.LOGIN_ACCOUNT_WINDOW_SECONDS)
@@ -0,0 +1,154 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from config import Config
+from app import db
+from app.models import Token
+from app.helpers.jwt import decode_jwt_token
+from app.helpers.metrics import AUTH_TOKEN_CACHE
+
+
+def token_digest(token):
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+class VerifiedTokenCache:
+    """
+    LRU claim JWT yang sudah diverifikasi, dengan key digest token. Entry
+    berlaku sampai exp token, sehingga tidak perlu TTL terpisah.
+    """
+
+    def __init__(self, maxsize=None):
+        self.maxsize = maxsize or Config.TOKEN_CACHE_MAX_SIZE
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, digest):
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(digest)
+            if entry is None:
+                return None
+            claims, expires_at = entry
+            if expires_at <= now:
+                del self._data[digest]
+                return None
+            self._data.move_to_end(digest)
+            return claims
+
+    def set(self, digest, claims):
+        expires_at = claims.get("exp")
+        if expires_at is None:
+            return
+        with self._lock:
+            self._data[digest] = (claims, expires_at)
+            self._data.move_to_end(digest)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def discard(self, digest):
+        with self._lock:
+            self._data.pop(digest, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class RevocationIndex:
+    """
+    Salinan in-memory digest token yang sudah di-revoke dari tabel Token.
+    Perubahan diambil secara incremental berdasarkan updated_at, dan index
+    dibangun ulang penuh secara berkala untuk membuang token yang sudah
+    expired. Revokasi dari proses ini langsung diterapkan lewat add().
+    """
+
+    def __init__(self):
+        self._revoked = set()
+        self._watermark = None
+        self._loaded_at = None
+        self._refreshed_at = None
+        self._lock = threading.Lock()
+
+    def __contains__(self, digest):
+        return digest in self._revoked
+
+    def __len__(self):
+        return len(self._revoked)
+
+    def add(self, digest):
+        self._revoked.add(digest)
+
+    def _apply(self, rows):
+        for digest, updated_at in rows:
+            self._revoked.add(digest)
+            if updated_at and (self._watermark is None or updated_at > self._watermark):
+                self._watermark = updated_at
+
+    def _query(self):
+        return db.session.query(Token.token, Token.updated_at).filter(Token.revoked_at.isnot(None))
+
+    def load(self):
+        now = datetime.utcnow()
+        rows = self._query().filter((Token.expires_at.is_(None)) | (Token.expires_at > now)).all()
+        self._revoked = set()
+        self._watermark = None
+        self._apply(rows)
+        self._loaded_at = self._refreshed_at = time.monotonic()
+
+    def refresh(self):
+        query = self._query()
+        if self._watermark is not None:
+            query = query.filter(Token.updated_at >= self._watermark)
+        self._apply(query.all())
+        self._refreshed_at = time.monotonic()
+
+    def ensure_fresh(self):
+        now = time.monotonic()
+        if self._refreshed_at is not None and now - self._refreshed_at < Config.TOKEN_REVOCATION_REFRESH_SECONDS:
+            return
+        with self._lock:
+            if self._loaded_at is None or now - self._loaded_at >= Config.TOKEN_REVOCATION_FULL_RELOAD_SECONDS:
+                self.load()
+            elif now - self._refreshed_at >= Config.TOKEN_REVOCATION_REFRESH_SECONDS:
+                self.refresh()
+
+
+verified_tokens = VerifiedTokenCache()
+revoked_tokens = RevocationIndex()
+
+
+def verify_token(token):
+    """
+    Pengganti decode_jwt_token untuk request: cek revokasi, lalu pakai claim
+    dari cache jika token sudah pernah diverifikasi.
+    """
+    digest = token_digest(token)
+    revoked_tokens.ensure_fresh()
+    if digest in revoked_tokens:
+        verified_tokens.discard(digest)
+        raise ValueError("Token has been revoked")
+
+    claims = verified_tokens.get(digest)
+    if claims is not None:
+        AUTH_TOKEN_CACHE.labels(result="hit").inc()
+        return claims
+
+    AUTH_TOKEN_CACHE.labels(result="miss").inc()
+    claims = decode_jwt_token(token)
+    verified_tokens.set(digest, claims)
+    return claims
+
+
+def revoke_digests(digests):
+    """
+    Dipanggil setelah commit revokasi agar proses ini langsung menolak token.
+    """
+    for digest in digests:
+        revoked_tokens.add(digest)
+        verified_tokens.discard(digest)
@@ -1,6 +1,6 @@
 from flask import request, jsonify
 from functools import wraps
-from app.helpers.jwt import decode_jwt_token
+from app.helpers.token_cache import verify_token
 
 def authenticate(f):
     
@@ -15,8 +15,9 @@ def authenticate(f):
             if not auth_header.startswith("Bearer "):
                 raise ValueError("Invalid Authorization header format. Use 'Bearer <token>'.")
             token = auth_header.split(" ")[1]
-            decoded = decode_jwt_token(token)
+            decoded = verify_token(token)
             request.user = decoded
+            request.token = token
             return f(*args, **kwargs)
 
         except ValueError as e:
@@ -35,7 +36,7 @@ def authenticate(f):
     return decorated_function
 
 
-def authorize(required_role):
+def authorize(*required_roles):
 
     def decorator(f):
         @wraps(f)
@@ -45,8 +46,9 @@ def authorize(required_role):
                 if not user:
                     raise ValueError("User not authenticated. Please provide a valid token.")
 
-                if user.get("role") != required_role:
-                    raise ValueError(f"Access forbidden. Role '{required_role}' is required.")
+                if user.get("role") not in required_roles:
+                    roles = "' or '".join(required_roles)
+                    raise ValueError(f"Access forbidden. Role '{roles}' is required.")
 
                 return f(*args, **kwargs)
 
@@ -3,6 +3,8 @@ from sqlalchemy.dialects.postgresql import UUID
 import uuid
 from datetime import datetime
 from werkzeug.security import generate_password_hash
+from config import Config
+from sqlalchemy import event
 from enum import Enum  
 
 class RoleEnum(Enum):
@@ -25,6 +27,9 @@ class User(db.Model):
     address = db.Column(db.String(255))
     lang = db.Column(db.String(50))
     lat = db.Column(db.String(50))
+    # Koordinat numerik, disinkronkan otomatis dari lat/lang (lihat event di bawah)
+    latitude = db.Column(db.Float)
+    longitude = db.Column(db.Float)
     fcm_token = db.Column(db.String, nullable=True) 
     role = db.Column(db.Enum(RoleEnum), nullable=False) 
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -33,26 +38,56 @@ class User(db.Model):
     # Relationships
     @staticmethod
     def hash_password(password):
-        return generate_password_hash(password)
+        return generate_password_hash(password, method=Config.PASSWORD_HASH_METHOD)
 
     tokens = db.relationship("Token", back_populates="user", cascade="all, delete-orphan")
     result_predicts = db.relationship("ResultPredict", back_populates="user", cascade="all, delete-orphan")
     cctvs = db.relationship("CCTV", back_populates="user", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # Prefilter bounding box untuk pencarian polisi terdekat
+        db.Index("ix_user_role_latitude_longitude", "role", "latitude", "longitude"),
+    )
+
+
+def parse_coordinate(value):
+    try:
+        return float(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+@event.listens_for(User.lat, "set")
+def _sync_latitude(target, value, oldvalue, initiator):
+    target.latitude = parse_coordinate(value)
+
+
+@event.listens_for(User.lang, "set")
+def _sync_longitude(target, value, oldvalue, initiator):
+    target.longitude = parse_coordinate(value)
+
 
 # Token Model
 class Token(db.Model):
     __tablename__ = "tokens"
     
     id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    token = db.Column(db.String(255), nullable=False)
-    user_id = db.Column(UUID(as_uuid=True), db.ForeignKey("user.id"), nullable=False)
+    # SHA-256 dari JWT, token aslinya tidak disimpan
+    token = db.Column(db.String(255), nullable=False, unique=True)
+    user_id = db.Column(UUID(as_uuid=True), db.ForeignKey("user.id"), nullable=False, index=True)
+    expires_at = db.Column(db.DateTime)
+    revoked_at = db.Column(db.DateTime)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, onupdate=datetime.utcnow, default=datetime.utcnow)
     
     # Relationships
     user = db.relationship("User", back_populates="tokens")
 
+    __table_args__ = (
+        # Refresh incremental index revokasi berdasarkan updated_at
+        db.Index("ix_tokens_revoked_at_updated_at", "revoked_at", "updated_at"),
+    )
+
 # ResultPredict Model
 class ResultPredict(db.Model):
     __tablename__ = "result_predicts"
@@ -68,6 +103,13 @@ class ResultPredict(db.Model):
     user = db.relationship("User", back_populates="result_predicts")
     predict = db.relationship("Predict", back_populates="result")
 
+    __table_args__ = (
+        # Keyset pagination feed laporan (created_at, id), dengan dan tanpa filter
+        db.Index("ix_result_predicts_created_at_id", "created_at", "id"),
+        db.Index("ix_result_predicts_user_id_created_at_id", "user_id", "created_at", "id"),
+        db.Index("ix_result_predicts_status_created_at_id", "status", "created_at", "id"),
+    )
+
 # Predict Model
 class Predict(db.Model):
     __tablename__ = "predicts"
@@ -102,9 +144,32 @@ class Images(db.Model):
     
     id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name_image = db.Column(db.String, nullable=False, index=True) 
-    predict_id = db.Column(UUID(as_uuid=True), db.ForeignKey("predicts.id"), nullable=False)
+    predict_id = db.Column(UUID(as_uuid=True), db.ForeignKey("predicts.id"), nullable=False, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, onupdate=datetime.utcnow, default=datetime.utcnow)
     
     # Relationships
     predict = db.relationship("Predict", back_populates="images")
+
+
+# Outbox Model
+class OutboxEvent(db.Model):
+    """
+    Event yang ditulis dalam transaksi yang sama dengan datanya, lalu dikirim
+    ke event transport oleh OutboxRelay. id dipakai sebagai idempotency key.
+    """
+    __tablename__ = "outbox_events"
+
+    id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    topic = db.Column(db.String, nullable=False)
+    key = db.Column(db.String)
+    payload = db.Column(db.LargeBinary, nullable=False)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.Text)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        # Relay mengambil event yang sudah waktunya dikirim, urut dari yang terlama
+        db.Index("ix_outbox_events_next_attempt_at_created_at", "next_attempt_at", "created_at"),
+    )
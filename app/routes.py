@@ -1,8 +1,13 @@
-from flask import Blueprint, request,jsonify
-from app.controllers.auth_controller import login_user
+import hmac
+from flask import Blueprint, Response, request,jsonify
+from app.controllers.auth_controller import login_user, logout_user
+from app.controllers.report_controller import list_reports, get_report
 from app.middlewares.auth_middleware import authenticate, authorize
+from app.helpers.metrics import CONTENT_TYPE, render_metrics
+from config import Config
 
 main_bp = Blueprint('main', __name__)
+metrics_bp = Blueprint('metrics', __name__)
 
 
 @main_bp.route('/', methods=['GET'])
@@ -15,7 +20,14 @@ def home():
 @main_bp.route('/api/v1/login', methods=['POST'])
 def login():
     data = request.get_json()
-    return login_user(data)
+    return login_user(data, ip=request.remote_addr)
+
+
+@main_bp.route('/api/v1/logout', methods=['POST'])
+@authenticate
+def logout():
+    data = request.get_json(silent=True) or {}
+    return logout_user(request.token, request.user, revoke_all=bool(data.get("all")))
 
 
 @main_bp.route('/me', methods=['GET'])
@@ -30,4 +42,31 @@ def protected():
             "user_id": user["id"],
             "role": user["role"]
         }
-    })
\ No newline at end of file
+    })
+
+
+@main_bp.route('/api/v1/reports', methods=['GET'])
+@authenticate
+@authorize("OWNER", "POLICE")
+def reports():
+    return list_reports(request.user, request.args)
+
+
+@main_bp.route('/api/v1/reports/<report_id>', methods=['GET'])
+@authenticate
+@authorize("OWNER", "POLICE")
+def report_detail(report_id):
+    return get_report(request.user, report_id)
+
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def metrics():
+    # Hanya didaftarkan jika METRICS_TOKEN di-set, scraper wajib mengirim token itu
+    expected = f"Bearer {Config.METRICS_TOKEN}".encode("utf-8")
+    if not hmac.compare_digest(request.headers.get("Authorization", "").encode("utf-8"), expected):
+        return jsonify({
+            "error": True,
+            "message": "Invalid metrics token.",
+            "data": None
+        }), 401
+    return Response(render_metrics(), content_type=CONTENT_TYPE)
@@ -0,0 +1,92 @@
+import numpy as np
+from config import Config
+
+# Satu baris per deteksi yang lolos filter
+DETECTION_DTYPE = np.dtype([
+    ("x1", np.int32),
+    ("y1", np.int32),
+    ("x2", np.int32),
+    ("y2", np.int32),
+    ("conf", np.float32),
+    ("cls", np.int16),
+])
+
+
+def empty_detections():
+    return np.empty(0, dtype=DETECTION_DTYPE)
+
+
+def parse_class_thresholds(value):
+    """
+    Parse "knife:0.8,gun:0.7" menjadi {"knife": 0.8, "gun": 0.7}.
+    """
+    thresholds = {}
+    for item in (value or "").split(","):
+        if ":" not in item:
+            continue
+        name, conf = item.split(":", 1)
+        thresholds[name.strip().lower()] = float(conf)
+    return thresholds
+
+
+def class_threshold_array(names, class_thresholds=None, default_threshold=None):
+    """
+    Membuat array threshold yang diindeks dengan class id dari dict names model.
+    """
+    if class_thresholds is None:
+        class_thresholds = parse_class_thresholds(Config.DETECTION_CLASS_THRESHOLDS)
+    default_threshold = Config.DETECTION_CONF_THRESHOLD if default_threshold is None else default_threshold
+
+    size = max(names.keys()) + 1 if names else 0
+    thresholds = np.full(size, default_threshold, dtype=np.float32)
+    for class_id, name in names.items():
+        if name.lower() in class_thresholds:
+            thresholds[class_id] = class_thresholds[name.lower()]
+    return thresholds
+
+
+def filter_detections(results, thresholds=None, min_size=None, min_aspect=None, max_aspect=None):
+    """
+    Menerapkan threshold confidence per kelas, cek aspect ratio dan ukuran
+    minimum ke seluruh array conf/cls/xyxy sekaligus dengan NumPy.
+    Mengembalikan structured array DETECTION_DTYPE berisi deteksi yang diterima.
+    """
+    if results is None or getattr(results, "boxes", None) is None or len(results.boxes) == 0:
+        return empty_detections()
+
+    if thresholds is None:
+        thresholds = class_threshold_array(results.names)
+    min_size = Config.DETECTION_MIN_SIZE if min_size is None else min_size
+    min_aspect = Config.DETECTION_MIN_ASPECT if min_aspect is None else min_aspect
+    max_aspect = Config.DETECTION_MAX_ASPECT if max_aspect is None else max_aspect
+
+    # Satu konversi tensor -> numpy untuk semua box: kolom x1, y1, x2, y2, conf, cls
+    data = results.boxes.data
+    data = data.cpu().numpy() if hasattr(data, "cpu") else np.asarray(data)
+
+    xyxy = data[:, :4].astype(np.int32)
+    conf = data[:, 4].astype(np.float32)
+    cls = data[:, 5].astype(np.int16)
+
+    width = xyxy[:, 2] - xyxy[:, 0]
+    height = xyxy[:, 3] - xyxy[:, 1]
+    aspect = np.divide(width, height, out=np.zeros(len(data), dtype=np.float32), where=height != 0)
+
+    # Kelas yang tidak dikenal model tidak pernah lolos
+    min_conf = np.full(len(cls), np.inf, dtype=np.float32)
+    known = (cls >= 0) & (cls < len(thresholds))
+    min_conf[known] = thresholds[cls[known]]
+    keep = (
+        (conf > min_conf)
+        & (aspect > min_aspect) & (aspect < max_aspect)
+        & (width > min_size) & (height > min_size)
+    )
+
+    detections = np.empty(int(keep.sum()), dtype=DETECTION_DTYPE)
+    detections["x1"] = xyxy[keep, 0]
+    detections["y1"] = xyxy[keep, 1]
+    detections["x2"] = xyxy[keep, 2]
+    detections["y2"] = xyxy[keep, 3]
+    detections["conf"] = conf[keep]
+    detections["cls"] = cls[keep]
+    return detections
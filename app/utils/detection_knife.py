@@ -1,49 +1,112 @@
 import cv2
 import numpy as np
-from ultralytics import YOLO
 from dotenv import load_dotenv
 import os
-from supabase import create_client, Client
 from datetime import datetime
 import uuid
-from io import BytesIO
+import threading
+import time
 from app.helpers.logger import setup_logger
+from app.helpers.metrics import (
+    DETECTOR_DETECTIONS, DETECTOR_FRAME_LAG_SECONDS, DETECTOR_FRAMES_INFERRED,
+    DETECTOR_FRAMES_SKIPPED, DETECTOR_STAGE_SECONDS,
+)
+from app.utils.frame_grabber import FrameGrabber
+from app.utils.upload_queue import UploadQueue
+from app.utils.model_backend import load_model as load_detection_model
+from app.utils.motion_gate import MotionGate
+from app.utils.detection_filter import class_threshold_array, filter_detections
+from app.utils.incident_tracker import IncidentTracker
+from app.utils.incident_session import IncidentSession
+from config import Config
 from app import create_app
 from app.controllers.detection_controller import get_owner_id_by_cctv_ip
-from app.controllers.detection_controller import create_report
+from app.controllers.detection_controller import create_reports
+from app.utils.report_batcher import ReportBatcher
 
 load_dotenv()
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 CCTV_IP = os.getenv("CCTV_IP")
 
-app = create_app()
 logger = setup_logger("detection")
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
-is_detection_active = True
 
-def save_detection_images(owner_id, image, label=""):
+# App, client Supabase dan upload queue dibuat saat pertama dipakai, sehingga
+# stage pipeline bisa di-import tanpa database atau jaringan (mis. benchmark).
+# Paket supabase juga baru di-import di get_supabase().
+_app = None
+_supabase = None
+_upload_queue = None
+_report_batcher = None
+_lazy_lock = threading.Lock()
+
+def get_app():
+    global _app
+    with _lazy_lock:
+        if _app is None:
+            _app = create_app()
+        return _app
+
+def get_supabase():
+    global _supabase
+    with _lazy_lock:
+        if _supabase is None:
+            from supabase import create_client
+            _supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+        return _supabase
+
+def get_upload_queue():
+    global _upload_queue
+    storage = get_supabase()
+    with _lazy_lock:
+        if _upload_queue is None:
+            _upload_queue = UploadQueue(storage).start()
+        return _upload_queue
+
+def get_report_batcher():
+    global _report_batcher
+    app = get_app()
+    with _lazy_lock:
+        if _report_batcher is None:
+            _report_batcher = ReportBatcher(app, create_reports).start()
+        return _report_batcher
+
+def stop_background_workers(timeout=5.0):
+    """
+    Menghentikan upload queue lalu report batcher (jika pernah dibuat) dan
+    menunggu antriannya habis. Upload dihentikan lebih dulu karena laporan
+    baru masuk ke batcher setelah semua uploadnya selesai.
+    """
+    with _lazy_lock:
+        upload_queue, report_batcher = _upload_queue, _report_batcher
+    if upload_queue is not None:
+        upload_queue.stop(timeout=timeout)
+    if report_batcher is not None:
+        report_batcher.stop(timeout=timeout)
+
+def save_detection_images(owner_id, image, label="", upload_queue=None):
+    """
+    Encode gambar lalu jadwalkan upload ke Supabase di background.
+    Mengembalikan Future yang berisi public URL, frame loop tidak menunggu I/O storage.
+    """
     try:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M")
         unique_id = str(uuid.uuid4())
         filename = f"{label}_{unique_id}.jpg"
 
-        _, buffer = cv2.imencode('.jpg', image)
-        file_bytes = BytesIO(buffer)
+        with DETECTOR_STAGE_SECONDS.labels(stage="encode").time():
+            _, buffer = cv2.imencode('.jpg', image)
 
         supabase_path = f"{owner_id}/{timestamp}/{filename}"
-        supabase.storage.from_("foto-maling").upload(supabase_path, file_bytes.getvalue())
-        public_url = supabase.storage.from_("foto-maling").get_public_url(supabase_path)
-
-        return public_url
+        return (upload_queue or get_upload_queue()).submit(supabase_path, buffer.tobytes())
     except Exception as e:
-        print(f"Error saving or uploading image: {e}")
+        logger.error(f"Error encoding or queueing image: {e}")
         return None
 
 def load_model(model_path):
     try:
-        # Load YOLO model
-        model = YOLO(model_path, task='detect')
+        # Load YOLO model (export/cache ONNX dan warm-up sesuai konfigurasi)
+        model = load_detection_model(model_path)
         logger.info(f"Model loaded successfully. Available classes: {model.names}")
         return model
     except Exception as e:
@@ -53,134 +116,225 @@ def load_model(model_path):
 def process_frame(frame, model):
     try:
         # Process frame with YOLO with higher confidence threshold
-        results = model(frame, conf=0.65)  # Increased confidence threshold
-        
-        # Add logging for debugging
-        if results and results[0].boxes:
-            for box in results[0].boxes:
-                conf = float(box.conf)
-                class_id = int(box.cls)
-                class_name = results[0].names[class_id]
-                logger.debug(f"Detection: {class_name} with confidence {conf:.2f}")
-        
+        results = model(frame, conf=Config.DETECTION_MODEL_CONF, imgsz=Config.DETECTION_IMGSZ, verbose=False)
         return results[0] if results else None
     except Exception as e:
         logger.error(f"Error processing frame: {e}")
         return None
 
-def draw_detections(frame, results, owner_id):
-    images_captured = []
-    
-    if results and hasattr(results, 'boxes'):
-        for box in results.boxes:
-            conf = float(box.conf)
-            class_id = int(box.cls)
-            class_name = results.names[class_id]
-            
-            # Additional validation for knife detection
-            is_valid_detection = False
-            if conf > 0.8:  # Increased confidence threshold
-                # Additional checks for knife detection
-                x1, y1, x2, y2 = map(int, box.xyxy[0])
-                detection_width = x2 - x1
-                detection_height = y2 - y1
-                aspect_ratio = detection_width / detection_height if detection_height != 0 else 0
-                
-                # Typical knife aspect ratio and size checks
-                if 0.15 < aspect_ratio < 5.0 and detection_width > 20 and detection_height > 20:
-                    is_valid_detection = True
-            
-            if is_valid_detection:
-                # Different colors for different classes
-                color = (0, 0, 255)  # Red for knife
-                
-                cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
-                label = f"{class_name}: {conf:.2f}"
-                cv2.putText(frame, label, (x1, y1 - 10), 
-                          cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
-                
-                # Additional logging
-                logger.info(f"Valid knife detection - Confidence: {conf:.2f}, " 
-                          f"Aspect Ratio: {aspect_ratio:.2f}, "
-                          f"Size: {detection_width}x{detection_height}")
-                
-                # Save detection image only for valid detections
-                image_url = save_detection_images(owner_id, frame, label=class_name.lower())
-                if image_url:
-                    images_captured.append(image_url)
-                    logger.info(f"Saved knife detection image with confidence {conf:.2f}")
-
-    return frame, images_captured
+def draw_detections(frame, detections, names):
+    """
+    Menggambar semua deteksi yang diterima ke frame. Hanya dipanggil untuk
+    frame yang disimpan sebagai bukti.
+    """
+    color = (0, 0, 255)  # Red for knife
+    for det in detections:
+        x1, y1, x2, y2 = int(det["x1"]), int(det["y1"]), int(det["x2"]), int(det["y2"])
+        label = f"{names[int(det['cls'])]}: {det['conf']:.2f}"
+        cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
+        cv2.putText(frame, label, (x1, y1 - 10),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
+    return frame
 
-def real_time_detection(model_path, camera_source):
-    logger.info("Starting real-time detection...")
-    camera_source = f"{CCTV_IP}/video"
-    
-    with app.app_context():
-        logger.info(f"Getting owner ID for CCTV IP: {CCTV_IP}")
-        owner_id = get_owner_id_by_cctv_ip(CCTV_IP)
-        
-        if not owner_id:
-            logger.error("Owner ID not found for the provided CCTV IP")
-            return
+def capture_evidence(frame, detections, names, owner_id, upload_queue=None):
+    """
+    Menggambar deteksi ke frame lalu menjadwalkan upload sebagai gambar bukti.
+    Mengembalikan Future URL, atau None jika gagal.
+    """
+    best = detections[np.argmax(detections["conf"])]
+    class_name = names[int(best["cls"])]
+    logger.info(f"Valid {class_name} detection - {len(detections)} box(es), "
+                f"best confidence: {best['conf']:.2f}")
 
-    global is_detection_active
-    
-    logger.info("Loading model...")
-    model = load_model(model_path)
-    logger.info("Model successfully loaded.")
+    frame = draw_detections(frame, detections, names)
+    return save_detection_images(owner_id, frame, label=class_name.lower(), upload_queue=upload_queue)
+
+def report_incident(incident, names, owner_id, upload_queue=None, report_batcher=None):
+    """
+    Jadwalkan upload bukti terbaik dari satu incident lalu serahkan ke
+    ReportBatcher. Mengembalikan Future hasil pembuatan laporan tanpa menunggu.
+    """
+    image_futures = []
+    for evidence in incident.best_evidence():
+        image_future = capture_evidence(evidence.frame, evidence.detections, names, owner_id,
+                                        upload_queue=upload_queue)
+        if image_future:
+            image_futures.append(image_future)
+
+    return (report_batcher or get_report_batcher()).submit(owner_id, image_futures, "Detection report generated.")
+
+def log_report_result(cctv_ip, future):
+    try:
+        result = future.result()
+    except Exception as e:
+        logger.error(f"[{cctv_ip}] Failed to create report: {e}")
+        return
+    if "error" in result:
+        logger.error(f"[{cctv_ip}] Report rejected: {result['error']}")
+    else:
+        logger.info(f"[{cctv_ip}] Report {result['report']['report_id']} created successfully.")
 
+def open_camera(camera_source):
     cap = cv2.VideoCapture(camera_source)
-    
+
     if not cap.isOpened():
-        logger.error("Unable to open video source.")
-        return
-    
+        logger.error(f"Unable to open video source: {camera_source}")
+        return None
+
     cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
     cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
     cap.set(cv2.CAP_PROP_FPS, 60)
-    all_images_captured = []
+    # Buffer sekecil mungkin, frame terbaru dipegang oleh FrameGrabber
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    return cap
+
+def _stage_seconds(stage):
+    return DETECTOR_STAGE_SECONDS.labels(stage=stage).time()
+
+class CameraPipeline:
+    """
+    Langkah per frame untuk satu kamera: motion gate, inference, filter,
+    tracking, sesi incident dan pelaporan. Dipakai oleh run_camera_detection
+    dan benchmark replay sehingga keduanya menjalankan pipeline yang sama.
+
+    report(incident) menyerahkan incident untuk dilaporkan dan mengembalikan
+    Future tanpa menunggu. stage_timer(stage) mengembalikan context manager
+    untuk mengukur tiap stage (default: histogram DETECTOR_STAGE_SECONDS).
+    """
+
+    def __init__(self, model, name, report, stage_timer=None, motion_gate=None):
+        self.model = model
+        self.name = name
+        self.report = report
+        self.stage_timer = stage_timer or _stage_seconds
+        motion_gate = Config.MOTION_GATE_ENABLED if motion_gate is None else motion_gate
+        self.motion_gate = MotionGate() if motion_gate else None
+        self.thresholds = class_threshold_array(model.names)
+        self.tracker = IncidentTracker()
+        self.session = IncidentSession()
+
+        self.frames_inferred = 0
+        self.frames_skipped = 0
+        self.detections = 0
+        self.reports = 0
+
+        self._frames_inferred = DETECTOR_FRAMES_INFERRED.labels(camera=name)
+        self._frames_skipped = DETECTOR_FRAMES_SKIPPED.labels(camera=name)
+        self._detections = DETECTOR_DETECTIONS.labels(camera=name)
+        self._frame_lag = DETECTOR_FRAME_LAG_SECONDS.labels(camera=name)
+
+    def process(self, frame, now, captured_at=None):
+        """
+        Memproses satu frame pada waktu now. Mengembalikan Future laporan
+        jika frame ini menutup incident yang dilaporkan, selain itu None.
+        """
+        # Lewati inference jika tidak ada gerakan
+        infer = True
+        if self.motion_gate is not None:
+            with self.stage_timer("motion"):
+                infer = self.motion_gate.should_infer(frame, now=now)
+
+        if infer:
+            with self.stage_timer("inference"):
+                results = process_frame(frame, self.model)
+            with self.stage_timer("postprocess"):
+                detections = filter_detections(results, self.thresholds)
+            with self.stage_timer("tracking"):
+                self.tracker.update(frame, detections, now=now)
+            if len(detections):
+                self.session.on_detection(now)
+            self.frames_inferred += 1
+            self.detections += len(detections)
+            self._frames_inferred.inc()
+            self._detections.inc(len(detections))
+            if captured_at is not None:
+                self._frame_lag.set(time.monotonic() - captured_at)
+        else:
+            self.frames_skipped += 1
+            self._frames_skipped.inc()
+
+        if self.session.tick(now) == IncidentSession.ACTIVE:
+            logger.info(f"[{self.name}] Incident session closed, state: {self.session.state}.")
+
+        return self._report_ready(now)
+
+    def flush(self):
+        """
+        Melaporkan incident yang masih terbuka saat sumber frame habis.
+        """
+        return self._report_ready(float("inf"))
+
+    def _report_ready(self, now):
+        incident = self.tracker.pop_ready_incident(now)
+        if not incident or not self.session.should_report():
+            return None
+        logger.info(f"[{self.name}] Incident with {len(incident.track_ids)} track(s) over "
+                    f"{incident.frames_seen} frame(s). Creating report...")
+        future = self.report(incident)
+        self.session.mark_reported()
+        self.reports += 1
+        return future
+
+def run_camera_detection(model, cctv_ip, owner_id, stop_event):
+    """
+    Loop deteksi untuk satu kamera. Model dipakai bersama oleh semua kamera,
+    deteksi dikelompokkan menjadi incident oleh tracker dan setiap sesi
+    incident menghasilkan satu laporan. Semua state disimpan per kamera dan
+    loop berjalan terus sampai stop_event di-set atau stream putus.
+    """
+    camera_source = f"{cctv_ip}/video"
+    logger.info(f"[{cctv_ip}] Opening video source {camera_source}")
+
+    cap = open_camera(camera_source)
+    if cap is None:
+        return
+
+    grabber = FrameGrabber(cap, name=cctv_ip).start()
+    pipeline = CameraPipeline(model, cctv_ip, lambda incident: report_incident(incident, model.names, owner_id))
 
     try:
-        while is_detection_active:
-            ret, frame = cap.read()
-            if not ret:
-                logger.error("Failed to read frame from camera.")
-                break
-
-            # Process the frame
-            results = process_frame(frame, model)
-            if results is not None:
-                # Detect and draw results
-                frame, images_captured = draw_detections(frame, results, owner_id)
-
-                # Add captured images to the list
-                for image_url in images_captured:
-                    if len(all_images_captured) < 5:
-                        all_images_captured.append(image_url)
-                        logger.info(f"Image URL added: {image_url}")
-                    else:
-                        break
-
-                # Stop detection after 5 images
-                if len(all_images_captured) >= 5:
-                    logger.info("5 images captured. Creating report...")
-                    with app.app_context():
-                        create_report(owner_id, all_images_captured[:5], "Detection report generated.")
-                    logger.info("Report created successfully.")
-                    is_detection_active = False  # Stop detection
+        while not stop_event.is_set():
+            frame, captured_at = grabber.read()
+            if frame is None:
+                if grabber.failed:
                     break
+                continue
 
-            # Optional: press 'q' to quit
-            if cv2.waitKey(1) & 0xFF == ord('q'):
-                logger.info("Detection stopped manually by user.")
-                break
+            report_future = pipeline.process(frame, time.monotonic(), captured_at)
+            if report_future is not None:
+                report_future.add_done_callback(
+                    lambda future, cctv_ip=cctv_ip: log_report_result(cctv_ip, future))
 
     except Exception as e:
-        logger.error(f"Error during detection: {e}")
-        print(f"Error during detection: {e}")
+        logger.error(f"[{cctv_ip}] Error during detection: {e}")
     finally:
-        cap.release()
-        cv2.destroyAllWindows()
-        is_detection_active = False
-        logger.info("Detection stopped, resources released.")
+        # cap di-release oleh thread grabber sendiri
+        grabber.stop()
+        stats = grabber.stats()
+        logger.info(f"[{cctv_ip}] Detection stopped, resources released. "
+                    f"Frames read: {stats['frames_read']}, dropped: {stats['frames_dropped']}")
+        if pipeline.motion_gate:
+            gate_stats = pipeline.motion_gate.stats()
+            logger.info(f"[{cctv_ip}] Motion gate - inferred: {gate_stats['frames_inferred']}, "
+                        f"skipped: {gate_stats['frames_skipped']}")
+
+def real_time_detection(model_path, camera_source):
+    """
+    Deteksi untuk satu kamera dari env CCTV_IP. Untuk banyak kamera gunakan
+    DetectionSupervisor di app/utils/detection_supervisor.py.
+    """
+    logger.info("Starting real-time detection...")
+
+    with get_app().app_context():
+        logger.info(f"Getting owner ID for CCTV IP: {CCTV_IP}")
+        owner_id = get_owner_id_by_cctv_ip(CCTV_IP)
+
+        if not owner_id:
+            logger.error("Owner ID not found for the provided CCTV IP")
+            return
+
+    logger.info("Loading model...")
+    model = load_model(model_path)
+    logger.info("Model successfully loaded.")
+
+    run_camera_detection(model, CCTV_IP, owner_id, threading.Event())
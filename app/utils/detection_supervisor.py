@@ -0,0 +1,125 @@
+import threading
+from config import Config
+from app.helpers.logger import setup_logger
+from app.utils.detection_knife import get_app, load_model, run_camera_detection
+from app.controllers.detection_controller import get_active_cctvs
+from app.utils.inference_scheduler import InferenceScheduler
+
+logger = setup_logger("supervisor")
+
+
+class CameraWorker:
+    def __init__(self, model, cctv_ip, owner_id):
+        self.cctv_ip = cctv_ip
+        self.owner_id = owner_id
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(
+            target=run_camera_detection,
+            args=(model, cctv_ip, owner_id, self.stop_event),
+            name=f"camera-{cctv_ip}",
+            daemon=True,
+        )
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def join(self, timeout=None):
+        """
+        Menunggu thread kamera selesai. Mengembalikan True jika sudah berhenti.
+        """
+        timeout = Config.CAMERA_STOP_TIMEOUT_SECONDS if timeout is None else timeout
+        self.thread.join(timeout=timeout)
+        if self.thread.is_alive():
+            logger.warning(f"Worker for CCTV {self.cctv_ip} did not stop within {timeout:g}s")
+            return False
+        return True
+
+    def is_alive(self):
+        return self.thread.is_alive()
+
+
+class DetectionSupervisor:
+    """
+    Membaca tabel CCTV secara berkala dan menjalankan satu worker per kamera.
+    Kamera yang ditambah atau dihapus akan diikuti tanpa restart proses.
+    Worker yang dihentikan selalu di-join; kamera yang workernya belum
+    selesai berhenti tidak dimulai ulang agar capture-nya tidak terbuka dua kali.
+    """
+
+    def __init__(self, model_path, refresh_interval=None):
+        self.model_path = model_path
+        self.refresh_interval = refresh_interval or Config.CCTV_REFRESH_INTERVAL
+        self.model = None
+        self.workers = {}
+        # Worker yang sudah diminta berhenti tapi belum selesai dalam timeout join
+        self._stopping = {}
+        self._stop_event = threading.Event()
+
+    def sync_cameras(self):
+        with get_app().app_context():
+            cameras = get_active_cctvs()
+
+        if cameras is None:
+            logger.warning("Could not read CCTV table, keeping current workers.")
+            return
+
+        removed = []
+        for cctv_ip, worker in list(self.workers.items()):
+            if cameras.get(cctv_ip) != worker.owner_id:
+                logger.info(f"Stopping worker for removed CCTV {cctv_ip}")
+                worker.stop()
+                removed.append(worker)
+                del self.workers[cctv_ip]
+            elif not worker.is_alive():
+                # Worker berhenti karena stream putus, mulai ulang
+                logger.info(f"Worker for CCTV {cctv_ip} exited, restarting.")
+                del self.workers[cctv_ip]
+
+        # Semua worker diberi sinyal dulu, baru di-join satu per satu
+        for worker in removed:
+            if not worker.join():
+                self._stopping[worker.cctv_ip] = worker
+        for cctv_ip, worker in list(self._stopping.items()):
+            if not worker.is_alive():
+                del self._stopping[cctv_ip]
+
+        for cctv_ip, owner_id in cameras.items():
+            if cctv_ip in self._stopping:
+                logger.info(f"Previous worker for CCTV {cctv_ip} is still stopping, starting it next sync.")
+                continue
+            if cctv_ip not in self.workers:
+                logger.info(f"Starting worker for CCTV {cctv_ip} (owner {owner_id})")
+                worker = CameraWorker(self.model, cctv_ip, owner_id)
+                worker.start()
+                self.workers[cctv_ip] = worker
+
+    def run(self):
+        logger.info("Loading shared model...")
+        # Semua kamera berbagi satu model lewat scheduler batch inference
+        self.model = InferenceScheduler(load_model(self.model_path)).start()
+        logger.info("Detection supervisor started.")
+
+        while not self._stop_event.is_set():
+            try:
+                self.sync_cameras()
+            except Exception as e:
+                logger.error(f"Error syncing cameras: {e}")
+            self._stop_event.wait(self.refresh_interval)
+
+        workers = list(self.workers.values()) + list(self._stopping.values())
+        for worker in workers:
+            worker.stop()
+        # Kamera di-join sebelum scheduler dihentikan, sehingga tidak ada
+        # frame yang masuk ke scheduler setelah antriannya dikosongkan
+        for worker in workers:
+            worker.join()
+        self.workers.clear()
+        self._stopping.clear()
+        self.model.stop()
+        logger.info("Detection supervisor stopped.")
+
+    def stop(self):
+        self._stop_event.set()
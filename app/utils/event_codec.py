@@ -0,0 +1,100 @@
+import json
+import struct
+import uuid
+from collections import namedtuple
+from config import Config
+
+try:
+    import msgpack
+except ImportError:  # encoding msgpack tidak tersedia, pakai JSON
+    msgpack = None
+
+MAGIC = b"TK"
+VERSION = 1
+
+ENCODING_JSON = 0
+ENCODING_MSGPACK = 1
+ENCODINGS = {"json": ENCODING_JSON, "msgpack": ENCODING_MSGPACK}
+
+# magic, version, encoding, event_id, user_id (penerima), report_id
+_HEADER = struct.Struct("!2sBB16s16s16s")
+HEADER_SIZE = _HEADER.size
+
+EventHeader = namedtuple("EventHeader", ["version", "encoding", "event_id", "user_id", "report_id"])
+
+
+def _uuid_bytes(value):
+    if value is None:
+        return bytes(16)
+    return (value if isinstance(value, uuid.UUID) else uuid.UUID(str(value))).bytes
+
+
+def _uuid_str(raw):
+    return None if raw == bytes(16) else str(uuid.UUID(bytes=raw))
+
+
+def resolve_encoding(name=None):
+    encoding = ENCODINGS.get((name or Config.EVENT_ENCODING).lower())
+    if encoding is None:
+        raise ValueError(f"Unknown event encoding '{name}'. Use json or msgpack.")
+    if encoding == ENCODING_MSGPACK and msgpack is None:
+        return ENCODING_JSON
+    return encoding
+
+
+def encode_body(body, encoding):
+    if encoding == ENCODING_MSGPACK:
+        return msgpack.packb(body, use_bin_type=True)
+    return json.dumps(body, separators=(",", ":")).encode("utf-8")
+
+
+def decode_body(data, encoding):
+    if encoding == ENCODING_MSGPACK:
+        if msgpack is None:
+            raise ValueError("Event encoded with msgpack but msgpack is not installed.")
+        return msgpack.unpackb(data, raw=False)
+    return json.loads(data)
+
+
+def encode_event(event_id, user_id, report_id, body, encoding=None):
+    """
+    Event = header biner berukuran tetap + body. body boleh berupa bytes yang
+    sudah di-encode dengan encoding yang sama (misal JSON laporan yang juga
+    dipakai untuk response HTTP), sehingga laporan tidak di-serialize ulang.
+    """
+    encoding = resolve_encoding() if encoding is None else encoding
+    if not isinstance(body, bytes):
+        body = encode_body(body, encoding)
+    header = _HEADER.pack(MAGIC, VERSION, encoding,
+                          _uuid_bytes(event_id), _uuid_bytes(user_id), _uuid_bytes(report_id))
+    return header + body
+
+
+def _is_legacy(data):
+    return not data.startswith(MAGIC)
+
+
+def read_header(data):
+    """
+    Membaca penerima dan ID event/laporan tanpa men-decode body. Event JSON
+    lama (sebelum versi 1) tetap didukung tetapi harus di-decode penuh.
+    """
+    if _is_legacy(data):
+        event = json.loads(data)
+        report = event.get("report") or {}
+        return EventHeader(0, ENCODING_JSON, event.get("event_id"), event.get("user_id"), report.get("report_id"))
+
+    magic, version, encoding, event_id, user_id, report_id = _HEADER.unpack_from(data)
+    if version > VERSION:
+        raise ValueError(f"Unsupported event version {version}.")
+    return EventHeader(version, encoding, _uuid_str(event_id), _uuid_str(user_id), _uuid_str(report_id))
+
+
+def decode_event(data):
+    """
+    Mengembalikan (EventHeader, report).
+    """
+    header = read_header(data)
+    if header.version == 0:
+        return header, json.loads(data).get("report")
+    return header, decode_body(data[HEADER_SIZE:], header.encoding)
@@ -0,0 +1,573 @@
+import mmap
+import os
+import struct
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from config import Config
+from app.helpers.logger import setup_logger
+from app.helpers.metrics import (
+    KAFKA_CONSUMER_BATCH_SECONDS, KAFKA_CONSUMER_LAG, KAFKA_MESSAGES_CONSUMED,
+)
+
+try:
+    import fcntl
+except ImportError:  # Windows: tanpa lock antar proses
+    fcntl = None
+
+logger = setup_logger("events")
+
+
+def _as_bytes(value):
+    if value is None or isinstance(value, bytes):
+        return value
+    return str(value).encode("utf-8")
+
+
+class Message:
+    """
+    Pesan dari backend lokal dengan interface yang sama seperti
+    confluent_kafka.Message (method topic(), key(), value(), ...).
+    """
+
+    __slots__ = ("_topic", "_offset", "_key", "_value")
+
+    def __init__(self, topic, offset, key, value):
+        self._topic = topic
+        self._offset = offset
+        self._key = key
+        self._value = value
+
+    def error(self):
+        return None
+
+    def topic(self):
+        return self._topic
+
+    def partition(self):
+        return 0
+
+    def offset(self):
+        return self._offset
+
+    def key(self):
+        return self._key
+
+    def value(self):
+        return self._value
+
+
+class TopicPartition:
+    """
+    Pengganti confluent_kafka.TopicPartition untuk backend lokal, sehingga
+    transport memory/file tidak membutuhkan confluent-kafka.
+    """
+
+    __slots__ = ("topic", "partition", "offset")
+
+    def __init__(self, topic, partition=-1, offset=-1001):
+        self.topic = topic
+        self.partition = partition
+        self.offset = offset
+
+    def __repr__(self):
+        return f"TopicPartition({self.topic!r}, {self.partition}, {self.offset})"
+
+
+def topic_partition_type(consumer):
+    """
+    Tipe TopicPartition yang diterima consumer: tipe lokal untuk
+    LocalConsumer, confluent_kafka.TopicPartition untuk consumer Kafka.
+    """
+    if isinstance(consumer, LocalConsumer):
+        return TopicPartition
+    from confluent_kafka import TopicPartition as KafkaTopicPartition
+    return KafkaTopicPartition
+
+
+class MemoryLog:
+    """
+    Log per topic di memori proses. Cocok untuk test dan deployment satu
+    proses (detector dan notifier di proses yang sama).
+    """
+
+    def __init__(self):
+        self._topics = {}
+        self._committed = {}
+        self._cond = threading.Condition()
+
+    def append(self, topic, key, value):
+        with self._cond:
+            records = self._topics.setdefault(topic, [])
+            records.append((key, value))
+            self._cond.notify_all()
+            return len(records) - 1
+
+    def end_offset(self, topic):
+        with self._cond:
+            return len(self._topics.get(topic, ()))
+
+    def read(self, topic, offset, max_messages):
+        with self._cond:
+            records = self._topics.get(topic, [])[offset:offset + max_messages]
+        return [Message(topic, offset + i, key, value) for i, (key, value) in enumerate(records)]
+
+    def wait(self, topics, positions, timeout):
+        with self._cond:
+            self._cond.wait_for(
+                lambda: any(len(self._topics.get(topic, ())) > positions[topic] for topic in topics),
+                timeout=timeout,
+            )
+
+    def committed(self, group_id, topic):
+        with self._cond:
+            return self._committed.get((group_id, topic), 0)
+
+    def commit(self, group_id, topic, offset):
+        with self._cond:
+            self._committed[(group_id, topic)] = offset
+
+    def close(self):
+        pass
+
+
+class FileLog:
+    """
+    Log append-only di disk, satu file per topic:
+
+    - <topic>.log   record berurutan: key_len (int32, -1 = None), value_len
+                    (int32), key, value
+    - <topic>.idx   posisi byte tiap record (uint64), offset = nomor record
+    - <topic>.<group>.offset  offset yang sudah di-commit oleh consumer group
+
+    Pembacaan memakai mmap. Writer dari beberapa proses diserialisasi dengan
+    flock; record baru terlihat oleh reader setelah entry index-nya ditulis.
+    """
+
+    _HEADER = struct.Struct("<ii")
+    _INDEX = struct.Struct("<Q")
+
+    def __init__(self, directory=None, poll_interval=0.05):
+        self.directory = directory or Config.EVENT_LOG_DIR
+        self.poll_interval = poll_interval
+        os.makedirs(self.directory, exist_ok=True)
+        self._writers = {}
+        self._maps = {}
+        self._lock = threading.Lock()
+
+    def _path(self, topic, suffix):
+        return os.path.join(self.directory, f"{topic}{suffix}")
+
+    def _writer(self, topic):
+        writer = self._writers.get(topic)
+        if writer is None:
+            writer = self._writers[topic] = (
+                open(self._path(topic, ".log"), "ab"),
+                open(self._path(topic, ".idx"), "ab"),
+            )
+        return writer
+
+    def append(self, topic, key, value):
+        key, value = _as_bytes(key), _as_bytes(value) or b""
+        record = self._HEADER.pack(-1 if key is None else len(key), len(value)) + (key or b"") + value
+        with self._lock:
+            log_file, index_file = self._writer(topic)
+            if fcntl:
+                fcntl.flock(log_file, fcntl.LOCK_EX)
+            try:
+                position = log_file.seek(0, os.SEEK_END)
+                log_file.write(record)
+                log_file.flush()
+                index_file.seek(0, os.SEEK_END)
+                index_file.write(self._INDEX.pack(position))
+                index_file.flush()
+                return index_file.tell() // self._INDEX.size - 1
+            finally:
+                if fcntl:
+                    fcntl.flock(log_file, fcntl.LOCK_UN)
+
+    def end_offset(self, topic):
+        try:
+            return os.path.getsize(self._path(topic, ".idx")) // self._INDEX.size
+        except FileNotFoundError:
+            return 0
+
+    def _map(self, path, min_size):
+        """
+        mmap read-only yang dipetakan ulang jika file sudah bertambah.
+        """
+        with self._lock:
+            mapped = self._maps.get(path)
+            if mapped is None or len(mapped) < min_size:
+                if mapped is not None:
+                    mapped.close()
+                with open(path, "rb") as f:
+                    mapped = self._maps[path] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            return mapped
+
+    def read(self, topic, offset, max_messages):
+        end = min(self.end_offset(topic), offset + max_messages)
+        if offset >= end:
+            return []
+        index = self._map(self._path(topic, ".idx"), end * self._INDEX.size)
+        positions = [self._INDEX.unpack_from(index, i * self._INDEX.size)[0] for i in range(offset, end)]
+
+        log_path = self._path(topic, ".log")
+        log = self._map(log_path, positions[-1] + self._HEADER.size)
+        last_key_len, last_value_len = self._HEADER.unpack_from(log, positions[-1])
+        log = self._map(log_path, positions[-1] + self._HEADER.size + max(last_key_len, 0) + last_value_len)
+
+        messages = []
+        for i, position in enumerate(positions):
+            key_len, value_len = self._HEADER.unpack_from(log, position)
+            start = position + self._HEADER.size
+            key = None if key_len < 0 else log[start:start + key_len]
+            start += max(key_len, 0)
+            messages.append(Message(topic, offset + i, key, log[start:start + value_len]))
+        return messages
+
+    def wait(self, topics, positions, timeout):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if any(self.end_offset(topic) > positions[topic] for topic in topics):
+                return
+            time.sleep(self.poll_interval)
+
+    def committed(self, group_id, topic):
+        try:
+            with open(self._path(topic, f".{group_id}.offset")) as f:
+                return int(f.read().strip() or 0)
+        except FileNotFoundError:
+            return 0
+
+    def commit(self, group_id, topic, offset):
+        path = self._path(topic, f".{group_id}.offset")
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(str(offset))
+        os.replace(tmp_path, path)
+
+    def close(self):
+        with self._lock:
+            for log_file, index_file in self._writers.values():
+                log_file.close()
+                index_file.close()
+            for mapped in self._maps.values():
+                mapped.close()
+            self._writers.clear()
+            self._maps.clear()
+
+
+class LocalConsumer:
+    """
+    Consumer untuk MemoryLog/FileLog dengan subset interface
+    confluent_kafka.Consumer yang dipakai BatchConsumer. Setiap topic punya
+    satu partisi; satu consumer aktif per group.
+    """
+
+    def __init__(self, log, group_id):
+        self.log = log
+        self.group_id = group_id
+        self._topics = []
+        self._positions = {}
+
+    def subscribe(self, topics):
+        self._topics = list(topics)
+        self._positions = {topic: self.log.committed(self.group_id, topic) for topic in self._topics}
+
+    def consume(self, num_messages=1, timeout=-1):
+        deadline = time.monotonic() + (timeout if timeout >= 0 else float("inf"))
+        while True:
+            messages = []
+            for topic in self._topics:
+                batch = self.log.read(topic, self._positions[topic], num_messages - len(messages))
+                if batch:
+                    self._positions[topic] = batch[-1].offset() + 1
+                    messages.extend(batch)
+                if len(messages) >= num_messages:
+                    break
+            remaining = deadline - time.monotonic()
+            if messages or remaining <= 0:
+                return messages
+            self.log.wait(self._topics, self._positions, min(remaining, 1.0))
+
+    def poll(self, timeout=-1):
+        messages = self.consume(1, timeout)
+        return messages[0] if messages else None
+
+    def seek(self, partition):
+        self._positions[partition.topic] = partition.offset
+
+    def commit(self, offsets=None, asynchronous=True):
+        if offsets is None:
+            offsets = [TopicPartition(topic, 0, position) for topic, position in self._positions.items()]
+        for tp in offsets:
+            self.log.commit(self.group_id, tp.topic, tp.offset)
+
+    def assignment(self):
+        return [TopicPartition(topic, 0) for topic in self._topics]
+
+    def position(self, partitions):
+        return [TopicPartition(tp.topic, 0, self._positions.get(tp.topic, -1)) for tp in partitions]
+
+    def get_watermark_offsets(self, partition, cached=False, timeout=None):
+        return 0, self.log.end_offset(partition.topic)
+
+    def close(self):
+        pass
+
+
+class KafkaTransport:
+    def produce(self, topic, key, value, on_delivery=None):
+        from app.utils.kafka_utils import produce_event
+        produce_event(topic, key=key, value=value, on_delivery=on_delivery)
+
+    def create_consumer(self, group_id):
+        from app.utils.kafka_utils import create_consumer
+        return create_consumer(group_id)
+
+    def flush(self, timeout=None):
+        from app.utils.kafka_utils import flush_producer
+        return flush_producer(timeout)
+
+    def close(self):
+        from app.utils.kafka_utils import close_producer
+        close_producer()
+
+
+class LocalTransport:
+    def __init__(self, log):
+        self.log = log
+
+    def produce(self, topic, key, value, on_delivery=None):
+        self.log.append(topic, _as_bytes(key), _as_bytes(value))
+        if on_delivery is not None:
+            on_delivery(None)
+
+    def create_consumer(self, group_id):
+        return LocalConsumer(self.log, group_id)
+
+    def flush(self, timeout=None):
+        # Append lokal langsung tersimpan
+        return 0
+
+    def close(self):
+        self.log.close()
+
+
+def create_transport(name=None):
+    name = (name or Config.EVENT_TRANSPORT).lower()
+    if name == "kafka":
+        return KafkaTransport()
+    if name == "memory":
+        return LocalTransport(MemoryLog())
+    if name == "file":
+        return LocalTransport(FileLog())
+    raise ValueError(f"Unknown event transport '{name}'. Use kafka, memory or file.")
+
+
+_transport = None
+_transport_lock = threading.Lock()
+
+
+def get_transport():
+    global _transport
+    if _transport is None:
+        with _transport_lock:
+            if _transport is None:
+                _transport = create_transport()
+                logger.info(f"Event transport: {Config.EVENT_TRANSPORT}")
+    return _transport
+
+
+def produce_event(topic, key, value, on_delivery=None):
+    """
+    on_delivery(err) dipanggil per pesan setelah transport mengonfirmasi
+    (err None) atau menolak pesan tersebut.
+    """
+    get_transport().produce(topic, key, value, on_delivery=on_delivery)
+
+
+def create_consumer(group_id):
+    return get_transport().create_consumer(group_id)
+
+
+def flush_events(timeout=None):
+    return get_transport().flush(timeout)
+
+
+class BatchConsumer:
+    """
+    Runtime consumer: poll per batch, proses di worker pool terbatas dengan
+    urutan per key tetap terjaga (pesan dengan key sama diproses berurutan di
+    lane yang sama), lalu commit offset hanya untuk pesan yang berhasil.
+
+    Pesan yang tetap gagal setelah retry dikirim ke dead letter topic jika
+    dikonfigurasi; jika tidak, partisinya di-seek kembali ke offset tersebut
+    sehingga pesan diproses ulang pada poll berikutnya, paling banyak
+    max_redeliveries kali sebelum pesan dilewati agar partisi tidak macet.
+    Untuk menambah throughput jalankan lebih banyak proses dengan group_id
+    yang sama.
+    """
+
+    def __init__(self, consumer, handler, topics=None, batch_size=None, workers=None,
+                 poll_timeout=None, max_retries=None, retry_backoff=None, dead_letter_topic=None,
+                 max_redeliveries=None):
+        self.consumer = consumer
+        self.handler = handler
+        self.topics = topics or [Config.TOPIC_NAME]
+        self.batch_size = batch_size or Config.KAFKA_CONSUMER_BATCH_SIZE
+        self.workers = workers or Config.KAFKA_CONSUMER_WORKERS
+        self.poll_timeout = Config.KAFKA_CONSUMER_POLL_TIMEOUT if poll_timeout is None else poll_timeout
+        self.max_retries = Config.KAFKA_CONSUMER_MAX_RETRIES if max_retries is None else max_retries
+        self.retry_backoff = Config.KAFKA_CONSUMER_RETRY_BACKOFF_SECONDS if retry_backoff is None else retry_backoff
+        self.dead_letter_topic = dead_letter_topic or Config.KAFKA_DEAD_LETTER_TOPIC
+        self.max_redeliveries = (Config.KAFKA_CONSUMER_MAX_REDELIVERIES
+                                 if max_redeliveries is None else max_redeliveries)
+        self._topic_partition = topic_partition_type(consumer)
+
+        # Jumlah redelivery per (topic, partition, offset) untuk pesan yang terus gagal
+        self._redeliveries = {}
+        self._redeliveries_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="event-consumer")
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        self.consumer.subscribe(self.topics)
+        logger.info(f"Consumer subscribed to {self.topics} "
+                    f"(batch {self.batch_size}, {self.workers} worker(s)).")
+        try:
+            while not self._stop_event.is_set():
+                messages = self.consumer.consume(num_messages=self.batch_size, timeout=self.poll_timeout)
+                batch = []
+                for msg in messages:
+                    if msg.error():
+                        logger.error(f"Consumer error: {msg.error()}")
+                        continue
+                    batch.append(msg)
+                if batch:
+                    self.process_batch(batch)
+                self._update_lag()
+        finally:
+            self._executor.shutdown(wait=True)
+            self.consumer.close()
+            logger.info("Consumer closed.")
+
+    def _lane(self, msg):
+        key = msg.key()
+        if key is None:
+            return hash((msg.topic(), msg.partition())) % self.workers
+        return hash((msg.topic(), key)) % self.workers
+
+    def _handle(self, msg):
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.handler(msg.key(), msg.value())
+                self._forget_redeliveries(msg)
+                return True
+            except Exception as e:
+                if attempt == self.max_retries:
+                    logger.error(f"Failed to handle message {msg.topic()}[{msg.partition()}]@{msg.offset()}: {e}")
+                    if self.dead_letter_topic:
+                        return self._dead_letter(msg)
+                    return self._give_up(msg)
+                if self._stop_event.wait(self.retry_backoff * (2 ** attempt)):
+                    return False
+
+    def _forget_redeliveries(self, msg):
+        if self._redeliveries:
+            with self._redeliveries_lock:
+                self._redeliveries.pop((msg.topic(), msg.partition(), msg.offset()), None)
+
+    def _give_up(self, msg):
+        """
+        Tanpa dead letter topic pesan diulang dari offset-nya; setelah
+        max_redeliveries kali pesan dilewati (True) agar partisi tetap jalan.
+        """
+        key = (msg.topic(), msg.partition(), msg.offset())
+        with self._redeliveries_lock:
+            redeliveries = self._redeliveries.get(key, 0)
+            if redeliveries < self.max_redeliveries:
+                self._redeliveries[key] = redeliveries + 1
+                return False
+            self._redeliveries.pop(key, None)
+        logger.error(f"Skipping message {msg.topic()}[{msg.partition()}]@{msg.offset()} "
+                     f"after {redeliveries} redelivery(ies).")
+        KAFKA_MESSAGES_CONSUMED.labels(topic=msg.topic(), result="skipped").inc()
+        return True
+
+    def _dead_letter(self, msg):
+        try:
+            produce_event(self.dead_letter_topic, key=msg.key(), value=msg.value())
+            KAFKA_MESSAGES_CONSUMED.labels(topic=msg.topic(), result="dead_letter").inc()
+            return True
+        except Exception as e:
+            logger.error(f"Failed to send message to dead letter topic {self.dead_letter_topic}: {e}")
+            return False
+
+    def _run_lane(self, messages):
+        """
+        Memproses pesan satu lane berurutan. Setelah satu pesan gagal, sisa
+        pesan di lane tidak diproses agar urutan per key tetap terjaga.
+        """
+        results = []
+        for i, msg in enumerate(messages):
+            ok = self._handle(msg)
+            results.append((msg, ok))
+            if not ok:
+                results.extend((rest, False) for rest in messages[i + 1:])
+                break
+        return results
+
+    def process_batch(self, batch):
+        with KAFKA_CONSUMER_BATCH_SECONDS.time():
+            lanes = {}
+            for msg in batch:
+                lanes.setdefault(self._lane(msg), []).append(msg)
+            futures = [self._executor.submit(self._run_lane, messages) for messages in lanes.values()]
+
+            # Per partisi: offset terkecil yang gagal dan offset terbesar di batch
+            failed, last = {}, {}
+            for future in futures:
+                for msg, ok in future.result():
+                    tp = (msg.topic(), msg.partition())
+                    last[tp] = max(last.get(tp, -1), msg.offset())
+                    if ok:
+                        KAFKA_MESSAGES_CONSUMED.labels(topic=msg.topic(), result="handled").inc()
+                    else:
+                        KAFKA_MESSAGES_CONSUMED.labels(topic=msg.topic(), result="failed").inc()
+                        failed[tp] = min(failed.get(tp, msg.offset()), msg.offset())
+
+            offsets = []
+            for (topic, partition), offset in last.items():
+                if (topic, partition) in failed:
+                    # Commit sampai sebelum pesan gagal pertama, lalu ulangi dari situ
+                    retry_from = failed[(topic, partition)]
+                    offsets.append(self._topic_partition(topic, partition, retry_from))
+                    self.consumer.seek(self._topic_partition(topic, partition, retry_from))
+                else:
+                    offsets.append(self._topic_partition(topic, partition, offset + 1))
+            self.consumer.commit(offsets=offsets, asynchronous=False)
+
+        if failed:
+            self._stop_event.wait(self.retry_backoff)
+
+    def _update_lag(self):
+        try:
+            positions = self.consumer.position(self.consumer.assignment())
+        except Exception as e:
+            logger.warning(f"Unable to read consumer positions: {e}")
+            return
+        for tp in positions:
+            if tp.offset < 0:
+                continue
+            _, high = self.consumer.get_watermark_offsets(tp, cached=True)
+            if high >= 0:
+                KAFKA_CONSUMER_LAG.labels(topic=tp.topic, partition=str(tp.partition)).set(max(high - tp.offset, 0))
+
+
+def consume_events(consumer, callback):
+    BatchConsumer(consumer, callback).run()
@@ -1,5 +1,19 @@
-import firebase_admin
-from firebase_admin import credentials
+import threading
+from config import Config
 
-cred = credentials.Certificate("app/keys/credentials.json")
-firebase_admin.initialize_app(cred)
+# firebase-admin baru di-import dan di-inisialisasi saat pertama dipakai
+# (proses notifier), bukan saat modul di-import
+_firebase_app = None
+_lock = threading.Lock()
+
+
+def get_firebase_app():
+    global _firebase_app
+    with _lock:
+        if _firebase_app is None:
+            import firebase_admin
+            from firebase_admin import credentials
+
+            cred = credentials.Certificate(Config.FIREBASE_CREDENTIALS_PATH)
+            _firebase_app = firebase_admin.initialize_app(cred)
+        return _firebase_app
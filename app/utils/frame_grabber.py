@@ -0,0 +1,110 @@
+import threading
+import time
+from app.helpers.logger import setup_logger
+from app.helpers.metrics import DETECTOR_FRAMES_DROPPED, DETECTOR_FRAMES_READ, DETECTOR_STAGE_SECONDS
+
+logger = setup_logger("detection")
+
+
+class FrameGrabber:
+    """
+    Thread capture khusus per stream. Frame terbaru selalu menimpa satu slot,
+    sehingga inference selalu mendapat frame paling baru dan buffer
+    OpenCV/FFmpeg tidak menumpuk. Frame yang tertimpa sebelum dibaca dihitung
+    sebagai frame yang di-drop.
+
+    Grabber memiliki cap: cap hanya dibaca dan di-release oleh thread grabber
+    sendiri saat loop-nya selesai. Me-release VideoCapture dari thread lain
+    selagi read() masih berjalan tidak thread-safe di OpenCV.
+    """
+
+    def __init__(self, cap, name="camera"):
+        self.cap = cap
+        self.name = name
+        self.frames_read = 0
+        self.frames_dropped = 0
+        self.failed = False
+
+        self._frame = None
+        self._seq = 0
+        self._last_returned_seq = 0
+        self._captured_at = None
+        self._condition = threading.Condition()
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"grabber-{name}", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=2.0):
+        """
+        Meminta thread grabber berhenti. Jika thread masih tertahan di
+        cap.read() (mis. stream RTSP macet) setelah timeout, cap akan
+        di-release oleh thread itu sendiri begitu read() kembali.
+        Mengembalikan True jika thread sudah selesai.
+        """
+        self._stop_event.set()
+        with self._condition:
+            self._condition.notify_all()
+        self._thread.join(timeout=timeout)
+        if self._thread.is_alive():
+            logger.warning(f"[{self.name}] Grabber still blocked in read(), capture will be released when it returns.")
+            return False
+        return True
+
+    def _run(self):
+        try:
+            self._grab_loop()
+        finally:
+            self.cap.release()
+
+    def _grab_loop(self):
+        capture_seconds = DETECTOR_STAGE_SECONDS.labels(stage="capture")
+        frames_read = DETECTOR_FRAMES_READ.labels(camera=self.name)
+        frames_dropped = DETECTOR_FRAMES_DROPPED.labels(camera=self.name)
+
+        while not self._stop_event.is_set():
+            with capture_seconds.time():
+                ret, frame = self.cap.read()
+            if not ret:
+                logger.error(f"[{self.name}] Failed to read frame from camera.")
+                with self._condition:
+                    self.failed = True
+                    self._condition.notify_all()
+                return
+
+            with self._condition:
+                # Frame sebelumnya belum sempat diambil consumer -> drop
+                if self._seq > self._last_returned_seq:
+                    self.frames_dropped += 1
+                    frames_dropped.inc()
+                self._frame = frame
+                self._seq += 1
+                self._captured_at = time.monotonic()
+                self.frames_read += 1
+                self._condition.notify_all()
+            frames_read.inc()
+
+    def read(self, timeout=5.0):
+        """
+        Menunggu frame yang lebih baru dari frame terakhir yang dikembalikan.
+        Mengembalikan (frame, captured_at), atau (None, None) jika stream gagal,
+        grabber dihentikan, atau timeout.
+        """
+        with self._condition:
+            has_new = self._condition.wait_for(
+                lambda: self._seq > self._last_returned_seq or self.failed or self._stop_event.is_set(),
+                timeout=timeout,
+            )
+            if not has_new or self._seq <= self._last_returned_seq:
+                return None, None
+            self._last_returned_seq = self._seq
+            return self._frame, self._captured_at
+
+    def stats(self):
+        with self._condition:
+            return {
+                "frames_read": self.frames_read,
+                "frames_dropped": self.frames_dropped,
+            }
@@ -0,0 +1,401 @@
+import math
+import threading
+import time
+from collections import namedtuple
+import numpy as np
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from config import Config
+from app import db
+from app.models import User, RoleEnum, parse_coordinate
+from app.helpers.logger import setup_logger
+
+logger = setup_logger("geo")
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = 111.32
+
+NearbyPolice = namedtuple("NearbyPolice", ["id", "name", "distance"])
+
+
+def haversine_km(lat, lng, lats, lngs):
+    """
+    Jarak (km) dari satu titik ke array titik lain.
+    """
+    lat, lng = math.radians(lat), math.radians(lng)
+    lats, lngs = np.radians(lats), np.radians(lngs)
+    a = np.sin((lats - lat) / 2) ** 2 + math.cos(lat) * np.cos(lats) * np.sin((lngs - lng) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def bounding_box(lat, lng, radius_km):
+    """
+    Kotak lat/lng yang pasti memuat lingkaran radius_km di sekitar titik.
+    """
+    dlat = radius_km / KM_PER_DEGREE
+    dlng = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(lat)), 1e-6))
+    return lat - dlat, lat + dlat, lng - dlng, lng + dlng
+
+
+def _nearby(ids, names, lats, lngs, lat, lng, radius_km=None):
+    if not ids:
+        return []
+    distances = haversine_km(lat, lng, np.array(lats), np.array(lngs))
+    order = np.argsort(distances)
+    if radius_km is not None:
+        order = order[distances[order] <= radius_km]
+    return [NearbyPolice(ids[i], names[i], float(distances[i])) for i in order]
+
+
+def query_police_in_radius(lat, lng, radius_km):
+    """
+    Pencarian langsung ke database: prefilter bounding box memakai index
+    (role, latitude, longitude), jarak pasti dihitung hanya untuk kandidat.
+    """
+    min_lat, max_lat, min_lng, max_lng = bounding_box(lat, lng, radius_km)
+    rows = db.session.query(User.id, User.name, User.latitude, User.longitude).filter(
+        User.role == RoleEnum.POLICE,
+        User.latitude.between(min_lat, max_lat),
+        User.longitude.between(min_lng, max_lng),
+    ).all()
+    return _nearby([r.id for r in rows], [r.name for r in rows],
+                   [r.latitude for r in rows], [r.longitude for r in rows], lat, lng, radius_km)
+
+
+class _Cell:
+    """
+    Anggota satu sel grid. Koordinat disimpan juga sebagai array numpy
+    (radian, plus cos lintang) yang dibangun ulang hanya setelah ada
+    perubahan, sehingga query tidak membuat list baru setiap kali.
+    """
+
+    __slots__ = ("members", "_arrays")
+
+    def __init__(self):
+        self.members = {}
+        self._arrays = None
+
+    def put(self, user_id, name, lat, lng):
+        self.members[user_id] = (name, lat, lng)
+        self._arrays = None
+
+    def discard(self, user_id):
+        self.members.pop(user_id, None)
+        self._arrays = None
+
+    def arrays(self):
+        if self._arrays is None:
+            ids = list(self.members)
+            names = [self.members[user_id][0] for user_id in ids]
+            coords = np.radians(np.array([self.members[user_id][1:] for user_id in ids],
+                                         dtype=np.float64).reshape(-1, 2))
+            lats, lngs = coords[:, 0].copy(), coords[:, 1].copy()
+            self._arrays = (ids, names, lats, lngs, np.cos(lats))
+        return self._arrays
+
+
+def _distances_km(lat, lng, cells):
+    """
+    Jarak haversine dari titik ke semua anggota cells, dalam urutan cells.
+    """
+    arrays = [cell.arrays() for cell in cells]
+    lats = np.concatenate([a[2] for a in arrays])
+    lngs = np.concatenate([a[3] for a in arrays])
+    cos_lats = np.concatenate([a[4] for a in arrays])
+    lat, lng = math.radians(lat), math.radians(lng)
+    a = np.sin((lats - lat) / 2) ** 2 + math.cos(lat) * cos_lats * np.sin((lngs - lng) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def _materialize(cells, distances, order):
+    """
+    NearbyPolice hanya untuk indeks terpilih (indeks global atas cells).
+    """
+    members = [cell.arrays()[:2] for cell in cells]
+    offsets = np.cumsum([0] + [len(ids) for ids, _ in members])
+    owners = (np.searchsorted(offsets, order, side="right") - 1).tolist()
+    locals_ = (order - offsets[owners]).tolist() if len(order) else []
+    return [
+        NearbyPolice(members[owner][0][local], members[owner][1][local], distance)
+        for owner, local, distance in zip(owners, locals_, distances[order].tolist())
+    ]
+
+
+class GeoGridIndex:
+    """
+    Grid index in-memory (sel berukuran cell_deg derajat) untuk lokasi polisi.
+    Query radius hanya memeriksa sel di bounding box lingkaran; k-nearest
+    memeriksa sel cincin demi cincin dari sel titik query dan berhenti begitu
+    tidak ada sel yang belum diperiksa yang bisa lebih dekat.
+    """
+
+    def __init__(self, cell_deg=None):
+        self.cell_deg = cell_deg or Config.GEO_INDEX_CELL_DEG
+        self._cells = {}
+        self._points = {}
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._points)
+
+    def _cell(self, lat, lng):
+        return int(math.floor(lat / self.cell_deg)), int(math.floor(lng / self.cell_deg))
+
+    def upsert(self, user_id, name, lat, lng):
+        with self._lock:
+            self.remove(user_id)
+            cell = self._cell(lat, lng)
+            members = self._cells.get(cell)
+            if members is None:
+                members = self._cells[cell] = _Cell()
+            members.put(user_id, name, lat, lng)
+            self._points[user_id] = cell
+
+    def remove(self, user_id):
+        with self._lock:
+            cell = self._points.pop(user_id, None)
+            if cell is None:
+                return
+            members = self._cells.get(cell)
+            if members is not None:
+                members.discard(user_id)
+                if not members.members:
+                    del self._cells[cell]
+
+    def clear(self):
+        with self._lock:
+            self._cells.clear()
+            self._points.clear()
+
+    def radius(self, lat, lng, radius_km):
+        """
+        Semua polisi dalam radius_km, urut dari yang terdekat.
+        """
+        min_lat, max_lat, min_lng, max_lng = bounding_box(lat, lng, radius_km)
+        min_row, min_col = self._cell(min_lat, min_lng)
+        max_row, max_col = self._cell(max_lat, max_lng)
+        with self._lock:
+            if (max_row - min_row + 1) * (max_col - min_col + 1) > len(self._cells):
+                cells = [cell for (row, col), cell in self._cells.items()
+                         if min_row <= row <= max_row and min_col <= col <= max_col]
+            else:
+                cells = [cell for cell in (self._cells.get((row, col))
+                                           for row in range(min_row, max_row + 1)
+                                           for col in range(min_col, max_col + 1)) if cell is not None]
+            if not cells:
+                return []
+            distances = _distances_km(lat, lng, cells)
+            inside = np.flatnonzero(distances <= radius_km)
+            order = inside[np.argsort(distances[inside], kind="stable")]
+            return _materialize(cells, distances, order)
+
+    def _unseen_lower_bound_km(self, lat, lng, row, col, ring):
+        """
+        Batas bawah jarak ke titik mana pun di luar blok sel
+        [row-ring, row+ring] x [col-ring, col+ring].
+        """
+        lat_lo = (row - ring) * self.cell_deg
+        lat_hi = (row + ring + 1) * self.cell_deg
+        lng_gap = min(lng - (col - ring) * self.cell_deg, (col + ring + 1) * self.cell_deg - lng)
+        # Di luar blok secara lintang: jarak >= selisih lintang
+        lat_bound = EARTH_RADIUS_KM * math.radians(min(lat - lat_lo, lat_hi - lat))
+        # Di luar blok secara bujur (lintang di dalam blok):
+        # hav(d) >= cos(lat) * cos(lat2) * hav(dlng), cos(lat2) minimal di tepi blok
+        cos_block = min(math.cos(math.radians(min(max(lat_lo, -90.0), 90.0))),
+                        math.cos(math.radians(min(max(lat_hi, -90.0), 90.0))))
+        hav = math.cos(math.radians(lat)) * max(cos_block, 0.0) * math.sin(math.radians(min(lng_gap, 180.0)) / 2) ** 2
+        lng_bound = 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(max(hav, 0.0), 1.0)))
+        return min(lat_bound, lng_bound)
+
+    def nearest(self, lat, lng, k, max_radius_km=None):
+        """
+        k polisi terdekat (opsional dibatasi max_radius_km), urut dari yang
+        terdekat. Sel diperiksa per cincin mengelilingi sel titik query;
+        pencarian berhenti jika jarak ke-k sudah tidak lebih jauh dari batas
+        bawah jarak sel yang belum diperiksa. Jika cincin berikutnya lebih
+        besar dari jumlah sel terisi, sisa sel diperiksa langsung.
+        """
+        if k <= 0:
+            return []
+        row, col = self._cell(lat, lng)
+        with self._lock:
+            cells, parts, seen = [], [], set()
+            ring = 0
+            while len(seen) < len(self._cells):
+                if (2 * ring + 1) ** 2 > len(self._cells):
+                    ring_cells = [cell for key, cell in self._cells.items() if key not in seen]
+                    if ring_cells:
+                        cells.extend(ring_cells)
+                        parts.append(_distances_km(lat, lng, ring_cells))
+                    break
+                ring_cells = []
+                for r in range(row - ring, row + ring + 1):
+                    # Baris tepi cincin diperiksa penuh, baris lain hanya dua sel ujung
+                    step = 1 if abs(r - row) == ring else 2 * ring
+                    for c in range(col - ring, col + ring + 1, step):
+                        cell = self._cells.get((r, c))
+                        if cell is not None:
+                            seen.add((r, c))
+                            ring_cells.append(cell)
+                if ring_cells:
+                    cells.extend(ring_cells)
+                    parts.append(_distances_km(lat, lng, ring_cells))
+                bound = self._unseen_lower_bound_km(lat, lng, row, col, ring)
+                if max_radius_km is not None and bound > max_radius_km:
+                    break
+                found = sum(len(part) for part in parts)
+                if found >= k and np.partition(np.concatenate(parts), k - 1)[k - 1] <= bound:
+                    break
+                ring += 1
+
+            if not cells:
+                return []
+            distances = np.concatenate(parts)
+            candidates = np.arange(len(distances))
+            if max_radius_km is not None:
+                candidates = candidates[distances <= max_radius_km]
+            if len(candidates) > k:
+                candidates = candidates[np.argpartition(distances[candidates], k - 1)[:k]]
+            order = candidates[np.argsort(distances[candidates], kind="stable")]
+            return _materialize(cells, distances, order)
+
+
+class PoliceLocator:
+    """
+    GeoGridIndex yang diisi dari tabel User. Perubahan dari proses ini
+    diterapkan setelah commit (lihat event session di bawah); perubahan dari
+    proses lain diambil secara incremental berdasarkan updated_at, dan index
+    dibangun ulang penuh secara berkala untuk menangkap user yang dihapus.
+    """
+
+    def __init__(self, index=None):
+        self.index = index or GeoGridIndex()
+        self._watermark = None
+        self._loaded_at = None
+        self._refreshed_at = None
+        self._lock = threading.Lock()
+
+    def _apply_row(self, row):
+        lat = row.latitude if row.latitude is not None else parse_coordinate(row.lat)
+        lng = row.longitude if row.longitude is not None else parse_coordinate(row.lang)
+        if row.role == RoleEnum.POLICE and lat is not None and lng is not None:
+            self.index.upsert(row.id, row.name, lat, lng)
+        else:
+            self.index.remove(row.id)
+        if row.updated_at and (self._watermark is None or row.updated_at > self._watermark):
+            self._watermark = row.updated_at
+
+    def _query(self):
+        return db.session.query(
+            User.id, User.name, User.role, User.lat, User.lang,
+            User.latitude, User.longitude, User.updated_at,
+        )
+
+    def load(self):
+        started = time.perf_counter()
+        rows = self._query().filter(User.role == RoleEnum.POLICE).all()
+        self.index.clear()
+        self._watermark = None
+        for row in rows:
+            self._apply_row(row)
+        self._loaded_at = self._refreshed_at = time.monotonic()
+        logger.info(f"Police geo index loaded: {len(self.index)} officer(s) "
+                    f"in {(time.perf_counter() - started) * 1000:.1f}ms")
+
+    def refresh(self):
+        query = self._query()
+        if self._watermark is not None:
+            query = query.filter(User.updated_at >= self._watermark)
+        for row in query.all():
+            self._apply_row(row)
+        self._refreshed_at = time.monotonic()
+
+    def ensure_fresh(self):
+        now = time.monotonic()
+        with self._lock:
+            if self._loaded_at is None or now - self._loaded_at >= Config.GEO_INDEX_FULL_REBUILD_SECONDS:
+                self.load()
+            elif now - self._refreshed_at >= Config.GEO_INDEX_REFRESH_SECONDS:
+                self.refresh()
+
+    def in_radius(self, lat, lng, radius_km):
+        self.ensure_fresh()
+        return self.index.radius(lat, lng, radius_km)
+
+    def nearest(self, lat, lng, k, max_radius_km=None):
+        self.ensure_fresh()
+        return self.index.nearest(lat, lng, k, max_radius_km)
+
+
+police_locator = PoliceLocator()
+
+
+def find_police_in_radius(lat, lng, radius_km=None):
+    radius_km = radius_km or Config.POLICE_SEARCH_RADIUS_KM
+    if Config.GEO_INDEX_ENABLED:
+        return police_locator.in_radius(lat, lng, radius_km)
+    return query_police_in_radius(lat, lng, radius_km)
+
+
+def find_nearest_police(lat, lng, k, max_radius_km=None):
+    if Config.GEO_INDEX_ENABLED:
+        return police_locator.nearest(lat, lng, k, max_radius_km)
+    # Tanpa index pencarian ke database harus dibatasi radius agar prefilter bounding box terpakai
+    return query_police_in_radius(lat, lng, max_radius_km or Config.POLICE_SEARCH_RADIUS_KM)[:k]
+
+
+def backfill_user_coordinates(batch_size=1000):
+    """
+    Mengisi kolom latitude/longitude untuk baris lama dari kolom string lat/lang,
+    per batch. Dijalankan sekali setelah kolom numerik ditambahkan:
+    `flask backfill-coordinates`. Mengembalikan jumlah user yang terisi.
+    """
+    updated = 0
+    last_id = None
+    while True:
+        query = User.query.filter(
+            (User.latitude.is_(None)) | (User.longitude.is_(None)),
+            User.lat.isnot(None), User.lang.isnot(None),
+        )
+        if last_id is not None:
+            query = query.filter(User.id > last_id)
+        users = query.order_by(User.id).limit(batch_size).all()
+        if not users:
+            return updated
+        for user in users:
+            user.latitude = parse_coordinate(user.lat)
+            user.longitude = parse_coordinate(user.lang)
+            if user.latitude is not None and user.longitude is not None:
+                updated += 1
+        # Baris dengan koordinat tidak valid tetap NULL, jadi paging memakai id
+        last_id = users[-1].id
+        db.session.commit()
+
+
+# Sinkronisasi incremental untuk perubahan User di proses ini
+@event.listens_for(Session, "after_flush")
+def _collect_user_changes(session, flush_context):
+    changes = session.info.setdefault("geo_index_changes", [])
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, User):
+            changes.append(("upsert", obj.id, obj.name, obj.role, obj.latitude, obj.longitude))
+    for obj in session.deleted:
+        if isinstance(obj, User):
+            changes.append(("remove", obj.id, None, None, None, None))
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_user_changes(session):
+    changes = session.info.pop("geo_index_changes", None)
+    if not changes or police_locator._loaded_at is None:
+        return
+    for action, user_id, name, role, lat, lng in changes:
+        if action == "upsert" and role == RoleEnum.POLICE and lat is not None and lng is not None:
+            police_locator.index.upsert(user_id, name, lat, lng)
+        else:
+            police_locator.index.remove(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_user_changes(session):
+    session.info.pop("geo_index_changes", None)
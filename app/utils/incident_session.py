@@ -0,0 +1,62 @@
+import time
+from config import Config
+
+
+class IncidentSession:
+    """
+    State incident per kamera: IDLE -> ACTIVE saat deteksi pertama, ditutup
+    setelah quiet_period detik tanpa deteksi, lalu COOLDOWN selama cooldown
+    detik sebelum laporan baru boleh dibuat. Satu sesi menghasilkan paling
+    banyak satu laporan; sesi yang ditutup tanpa laporan langsung kembali
+    ke IDLE tanpa cooldown.
+    """
+
+    IDLE = "IDLE"
+    ACTIVE = "ACTIVE"
+    COOLDOWN = "COOLDOWN"
+
+    def __init__(self, quiet_period=None, cooldown=None):
+        self.quiet_period = Config.INCIDENT_QUIET_SECONDS if quiet_period is None else quiet_period
+        self.cooldown = Config.INCIDENT_COOLDOWN_SECONDS if cooldown is None else cooldown
+
+        self.state = self.IDLE
+        self.opened_at = None
+        self.last_detection_at = None
+        self.cooldown_until = None
+        self.reported = False
+        self.sessions_opened = 0
+
+    def on_detection(self, now=None):
+        now = time.monotonic() if now is None else now
+        self.tick(now)
+        if self.state == self.IDLE:
+            self.state = self.ACTIVE
+            self.opened_at = now
+            self.reported = False
+            self.sessions_opened += 1
+        if self.state == self.ACTIVE:
+            self.last_detection_at = now
+
+    def tick(self, now=None):
+        """
+        Menjalankan transisi berbasis waktu. Mengembalikan state lama jika
+        terjadi transisi, selain itu None.
+        """
+        now = time.monotonic() if now is None else now
+        if self.state == self.ACTIVE and now - self.last_detection_at > self.quiet_period:
+            if self.reported:
+                self.state = self.COOLDOWN
+                self.cooldown_until = now + self.cooldown
+            else:
+                self.state = self.IDLE
+            return self.ACTIVE
+        if self.state == self.COOLDOWN and now >= self.cooldown_until:
+            self.state = self.IDLE
+            return self.COOLDOWN
+        return None
+
+    def should_report(self):
+        return self.state == self.ACTIVE and not self.reported
+
+    def mark_reported(self):
+        self.reported = True
@@ -0,0 +1,183 @@
+import itertools
+import time
+import numpy as np
+from config import Config
+
+
+def box_iou(boxes_a, boxes_b):
+    """
+    IoU antara setiap pasangan box (N, 4) dan (M, 4) format xyxy, hasil (N, M).
+    """
+    boxes_a = np.asarray(boxes_a, dtype=np.float32).reshape(-1, 4)
+    boxes_b = np.asarray(boxes_b, dtype=np.float32).reshape(-1, 4)
+
+    x1 = np.maximum(boxes_a[:, None, 0], boxes_b[None, :, 0])
+    y1 = np.maximum(boxes_a[:, None, 1], boxes_b[None, :, 1])
+    x2 = np.minimum(boxes_a[:, None, 2], boxes_b[None, :, 2])
+    y2 = np.minimum(boxes_a[:, None, 3], boxes_b[None, :, 3])
+    intersection = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+
+    area_a = (boxes_a[:, 2] - boxes_a[:, 0]) * (boxes_a[:, 3] - boxes_a[:, 1])
+    area_b = (boxes_b[:, 2] - boxes_b[:, 0]) * (boxes_b[:, 3] - boxes_b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - intersection
+    return np.divide(intersection, union, out=np.zeros_like(intersection), where=union > 0)
+
+
+def detection_boxes(detections):
+    return np.stack([detections["x1"], detections["y1"], detections["x2"], detections["y2"]], axis=1)
+
+
+class Track:
+    __slots__ = ("id", "box", "conf", "hits", "first_seen", "last_seen")
+
+    def __init__(self, track_id, box, conf, now):
+        self.id = track_id
+        self.box = box
+        self.conf = conf
+        self.hits = 1
+        self.first_seen = now
+        self.last_seen = now
+
+
+class EvidenceFrame:
+    __slots__ = ("score", "frame", "detections", "box", "captured_at")
+
+    def __init__(self, score, frame, detections, box, captured_at):
+        self.score = score
+        self.frame = frame
+        self.detections = detections
+        self.box = box
+        self.captured_at = captured_at
+
+
+class Incident:
+    """
+    Satu kejadian: kumpulan track yang saling tumpang tindih waktunya.
+    Menyimpan maksimal max_evidence frame dengan skor terbaik yang cukup berbeda
+    satu sama lain (posisi box atau waktu).
+    """
+
+    def __init__(self, now, max_evidence, diversity_iou, min_interval):
+        self.started_at = now
+        self.last_seen = now
+        self.track_ids = set()
+        self.evidence = []
+        self.frames_seen = 0
+        self.max_evidence = max_evidence
+        self.diversity_iou = diversity_iou
+        self.min_interval = min_interval
+
+    def _is_similar(self, candidate, box, now):
+        return (abs(now - candidate.captured_at) < self.min_interval
+                and box_iou(candidate.box, box)[0, 0] >= self.diversity_iou)
+
+    def offer(self, frame, detections, now):
+        self.frames_seen += 1
+        self.last_seen = now
+
+        best = int(np.argmax(detections["conf"]))
+        score = float(detections["conf"][best])
+        box = detection_boxes(detections[best:best + 1])[0]
+
+        # Frame yang mirip dengan bukti yang sudah ada hanya menggantikannya jika skornya lebih tinggi
+        for i, candidate in enumerate(self.evidence):
+            if self._is_similar(candidate, box, now):
+                if score > candidate.score:
+                    self.evidence[i] = EvidenceFrame(score, frame, detections, box, now)
+                return
+
+        if len(self.evidence) < self.max_evidence:
+            self.evidence.append(EvidenceFrame(score, frame, detections, box, now))
+            return
+
+        worst = min(range(len(self.evidence)), key=lambda i: self.evidence[i].score)
+        if score > self.evidence[worst].score:
+            self.evidence[worst] = EvidenceFrame(score, frame, detections, box, now)
+
+    def best_evidence(self):
+        return sorted(self.evidence, key=lambda candidate: candidate.score, reverse=True)
+
+
+class IncidentTracker:
+    """
+    Tracker multi-objek ringan berbasis IoU untuk deteksi yang sudah difilter.
+    Track yang terkonfirmasi (min_hits) membuka incident; incident siap
+    dilaporkan setelah evidence_window detik atau saat semua track hilang
+    lebih dari max_age detik.
+    """
+
+    def __init__(self, iou_threshold=None, max_age=None, min_hits=None, max_evidence=None,
+                 evidence_window=None, diversity_iou=None, min_interval=None):
+        self.iou_threshold = Config.TRACK_IOU_THRESHOLD if iou_threshold is None else iou_threshold
+        self.max_age = Config.TRACK_MAX_AGE_SECONDS if max_age is None else max_age
+        self.min_hits = min_hits or Config.TRACK_MIN_HITS
+        self.max_evidence = max_evidence or Config.INCIDENT_MAX_EVIDENCE
+        self.evidence_window = Config.INCIDENT_EVIDENCE_WINDOW_SECONDS if evidence_window is None else evidence_window
+        self.diversity_iou = Config.INCIDENT_DIVERSITY_IOU if diversity_iou is None else diversity_iou
+        self.min_interval = Config.INCIDENT_MIN_INTERVAL_SECONDS if min_interval is None else min_interval
+
+        self.tracks = []
+        self.incident = None
+        self._track_ids = itertools.count(1)
+
+    def _match(self, boxes, detections, now):
+        """
+        Greedy matching berdasarkan IoU tertinggi. Mengembalikan track yang
+        cocok dengan tiap deteksi (None untuk deteksi baru).
+        """
+        matched = [None] * len(boxes)
+        if not self.tracks or not len(boxes):
+            return matched
+
+        iou = box_iou(np.stack([track.box for track in self.tracks]), boxes)
+        while True:
+            t, d = np.unravel_index(np.argmax(iou), iou.shape)
+            if iou[t, d] < self.iou_threshold:
+                break
+            track = self.tracks[t]
+            track.box = boxes[d]
+            track.conf = float(detections["conf"][d])
+            track.hits += 1
+            track.last_seen = now
+            matched[d] = track
+            iou[t, :] = -1
+            iou[:, d] = -1
+        return matched
+
+    def update(self, frame, detections, now=None):
+        now = time.monotonic() if now is None else now
+
+        if len(detections):
+            boxes = detection_boxes(detections).astype(np.float32)
+            matched = self._match(boxes, detections, now)
+            for d, track in enumerate(matched):
+                if track is None:
+                    track = Track(next(self._track_ids), boxes[d], float(detections["conf"][d]), now)
+                    self.tracks.append(track)
+                    matched[d] = track
+
+            confirmed = np.array([track.hits >= self.min_hits for track in matched])
+            if confirmed.any():
+                if self.incident is None:
+                    self.incident = Incident(now, self.max_evidence, self.diversity_iou, self.min_interval)
+                self.incident.track_ids.update(track.id for track in matched if track.hits >= self.min_hits)
+                self.incident.offer(frame, detections[confirmed], now)
+
+        self.tracks = [track for track in self.tracks if now - track.last_seen <= self.max_age]
+
+    def pop_ready_incident(self, now=None):
+        """
+        Mengembalikan incident yang sudah cukup bukti atau sudah selesai, lalu
+        memulai pengumpulan incident berikutnya.
+        """
+        now = time.monotonic() if now is None else now
+        if self.incident is None:
+            return None
+
+        window_elapsed = now - self.incident.started_at >= self.evidence_window
+        closed = now - self.incident.last_seen > self.max_age
+        if not (window_elapsed or closed):
+            return None
+
+        incident, self.incident = self.incident, None
+        return incident
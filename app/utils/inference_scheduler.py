@@ -0,0 +1,128 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from config import Config
+from app.helpers.logger import setup_logger
+from app.helpers.metrics import DETECTOR_QUEUE_DEPTH
+
+logger = setup_logger("inference")
+
+
+class _InferenceRequest:
+    __slots__ = ("frame", "kwargs", "key", "future", "enqueued_at")
+
+    def __init__(self, frame, kwargs):
+        self.frame = frame
+        self.kwargs = kwargs
+        self.key = tuple(sorted(kwargs.items()))
+        self.future = Future()
+        self.enqueued_at = time.monotonic()
+
+
+class InferenceScheduler:
+    """
+    Mengumpulkan frame dari banyak kamera dan menjalankannya ke model dalam
+    satu batch, sampai batch_size frame atau max_wait detik sejak frame
+    tertua masuk. Hasil dikembalikan ke masing-masing kamera lewat Future.
+
+    Bisa dipanggil seperti model YOLO biasa: scheduler(frame, conf=0.65)
+    mengembalikan list berisi satu hasil. Setelah stop(), submit() langsung
+    mengembalikan Future yang gagal sehingga kamera tidak menunggu selamanya.
+    """
+
+    def __init__(self, model, batch_size=None, max_wait=None, result_timeout=None):
+        self.model = model
+        self.batch_size = batch_size or Config.INFERENCE_BATCH_SIZE
+        self.max_wait = Config.INFERENCE_MAX_WAIT_MS / 1000.0 if max_wait is None else max_wait
+        self.result_timeout = Config.INFERENCE_RESULT_TIMEOUT_SECONDS if result_timeout is None else result_timeout
+        self.batches_run = 0
+        self.frames_inferred = 0
+
+        self._pending = deque()
+        self._condition = threading.Condition()
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="inference-scheduler", daemon=True)
+
+    @property
+    def names(self):
+        return self.model.names
+
+    def start(self):
+        DETECTOR_QUEUE_DEPTH.labels(queue="inference").set_function(self.queue_depth)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        with self._condition:
+            self._stop_event.set()
+            self._condition.notify_all()
+        self._thread.join(timeout=2.0)
+
+        with self._condition:
+            while self._pending:
+                self._pending.popleft().future.set_exception(RuntimeError("Inference scheduler stopped"))
+
+    def submit(self, frame, **kwargs):
+        request = _InferenceRequest(frame, kwargs)
+        with self._condition:
+            # Dicek di bawah lock yang sama dengan stop(), jadi request tidak
+            # bisa masuk setelah antrian dikosongkan
+            if self._stop_event.is_set():
+                request.future.set_exception(RuntimeError("Inference scheduler stopped"))
+                return request.future
+            self._pending.append(request)
+            self._condition.notify_all()
+        return request.future
+
+    def __call__(self, frame, **kwargs):
+        return [self.submit(frame, **kwargs).result(timeout=self.result_timeout)]
+
+    def queue_depth(self):
+        with self._condition:
+            return len(self._pending)
+
+    def _next_batch(self):
+        with self._condition:
+            self._condition.wait_for(lambda: self._pending or self._stop_event.is_set())
+            if self._stop_event.is_set():
+                return []
+
+            deadline = self._pending[0].enqueued_at + self.max_wait
+            while len(self._pending) < self.batch_size and not self._stop_event.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+
+            # Satu batch hanya berisi request dengan argumen model yang sama
+            key = self._pending[0].key
+            batch, rest = [], deque()
+            while self._pending and len(batch) < self.batch_size:
+                request = self._pending.popleft()
+                if request.key == key:
+                    batch.append(request)
+                else:
+                    rest.append(request)
+            self._pending.extendleft(reversed(rest))
+            return batch
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            batch = self._next_batch()
+            if not batch:
+                continue
+
+            try:
+                results = self.model([request.frame for request in batch], **batch[0].kwargs)
+                for request, result in zip(batch, results):
+                    request.future.set_result(result)
+                for request in batch[len(results):]:
+                    request.future.set_exception(RuntimeError("Model returned fewer results than frames"))
+                self.batches_run += 1
+                self.frames_inferred += len(batch)
+            except Exception as e:
+                logger.error(f"Error running batched inference: {e}")
+                for request in batch:
+                    if not request.future.done():
+                        request.future.set_exception(e)
@@ -1,34 +1,128 @@
 from confluent_kafka import Producer, Consumer
+import atexit
 import os
+import threading
+from config import Config
+from app.helpers.logger import setup_logger
+from app.helpers.metrics import KAFKA_DELIVERY_SECONDS, KAFKA_MESSAGES_PRODUCED, KAFKA_PRODUCER_QUEUE_DEPTH
 
 KAFKA_BROKER = os.getenv("KAFKA_BROKER")
 TOPIC_NAME = os.getenv("TOPIC_NAME")
 
+logger = setup_logger("kafka")
+
+# Satu producer per proses, dibuat saat pertama kali dipakai
+_producer = None
+_producer_lock = threading.Lock()
+
+
 def create_producer():
-    return Producer({'bootstrap.servers': KAFKA_BROKER})
+    return Producer({
+        'bootstrap.servers': KAFKA_BROKER,
+        'linger.ms': Config.KAFKA_LINGER_MS,
+        'batch.size': Config.KAFKA_BATCH_SIZE,
+        'compression.type': Config.KAFKA_COMPRESSION,
+        'acks': Config.KAFKA_ACKS,
+        'queue.buffering.max.messages': Config.KAFKA_QUEUE_MAX_MESSAGES,
+    })
+
+
+def get_producer():
+    global _producer
+    if _producer is None:
+        with _producer_lock:
+            if _producer is None:
+                producer = _producer = create_producer()
+                KAFKA_PRODUCER_QUEUE_DEPTH.set_function(lambda: len(producer))
+                # Delivery callback dijalankan oleh thread poll, bukan oleh pemanggil produce
+                threading.Thread(target=_poll_loop, args=(producer,), name="kafka-producer-poll",
+                                 daemon=True).start()
+    return _producer
+
+
+def _poll_loop(producer):
+    # Berhenti setelah close_producer melepas producer ini
+    while _producer is producer:
+        producer.poll(0.1)
+
+
+def _delivery_report(err, msg):
+    topic = msg.topic()
+    if err is not None:
+        KAFKA_MESSAGES_PRODUCED.labels(topic=topic, result="failed").inc()
+        logger.error(f"Kafka delivery to {topic} failed: {err}")
+        return
+    KAFKA_MESSAGES_PRODUCED.labels(topic=topic, result="delivered").inc()
+    latency = msg.latency()
+    if latency is not None:
+        KAFKA_DELIVERY_SECONDS.observe(latency)
+
+
+def produce_event(topic, key, value, on_delivery=None):
+    """
+    Mengirim event secara asynchronous: pesan masuk antrian producer dan
+    dikirim per batch (linger.ms), hasil pengiriman dicatat oleh delivery
+    callback. Tidak menunggu broker.
+
+    on_delivery(err) opsional dipanggil per pesan setelah broker menerima
+    (err None) atau menolak pesan tersebut.
+    """
+    producer = get_producer()
+    callback = _delivery_report
+    if on_delivery is not None:
+        def callback(err, msg):
+            _delivery_report(err, msg)
+            on_delivery(err)
+    try:
+        producer.produce(topic, key=key, value=value, on_delivery=callback)
+    except BufferError:
+        # Antrian lokal penuh: beri waktu untuk mengosongkan lalu coba sekali lagi
+        logger.warning(f"Kafka producer queue full ({len(producer)} messages), waiting...")
+        producer.poll(Config.KAFKA_PRODUCE_BLOCK_SECONDS)
+        try:
+            producer.produce(topic, key=key, value=value, on_delivery=callback)
+        except BufferError:
+            KAFKA_MESSAGES_PRODUCED.labels(topic=topic, result="dropped").inc()
+            raise
+
+
+def flush_producer(timeout=None):
+    """
+    Menunggu antrian producer kosong. Mengembalikan jumlah pesan yang masih
+    di antrian saat timeout; pesan yang gagal dikirim sudah keluar dari
+    antrian dan hanya terlihat lewat delivery callback.
+    """
+    producer = _producer
+    if producer is None:
+        return 0
+    return producer.flush(Config.KAFKA_FLUSH_TIMEOUT_SECONDS if timeout is None else timeout)
+
+
+def close_producer(timeout=None):
+    """
+    Mengirim semua pesan yang masih di antrian sebelum proses berhenti.
+    """
+    global _producer
+    with _producer_lock:
+        producer, _producer = _producer, None
+    if producer is None:
+        return
+    timeout = Config.KAFKA_FLUSH_TIMEOUT_SECONDS if timeout is None else timeout
+    remaining = producer.flush(timeout)
+    if remaining:
+        logger.error(f"Kafka producer closed with {remaining} undelivered message(s).")
+    else:
+        logger.info("Kafka producer flushed.")
+
+
+atexit.register(close_producer)
+
 
 def create_consumer(group_id):
     return Consumer({
         'bootstrap.servers': KAFKA_BROKER,
         'group.id': group_id,
-        'auto.offset.reset': 'earliest'
+        'auto.offset.reset': 'earliest',
+        # Offset di-commit manual setelah pesan berhasil diproses
+        'enable.auto.commit': False,
     })
-
-def produce_event(topic, key, value):
-    producer = create_producer()
-    producer.produce(topic, key=key, value=value)
-    producer.flush()
-
-def consume_events(consumer, callback):
-    consumer.subscribe([TOPIC_NAME])
-    while True:
-        msg = consumer.poll(1.0)  # 1 second timeout
-        if msg is None:
-            continue
-        if msg.error():
-            logger.error(f"Consumer error: {msg.error()}")
-            continue
-        
-        logger.info(f"Message received: {msg.value().decode('utf-8')}")
-        callback(msg.key(), msg.value())
-
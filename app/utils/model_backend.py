@@ -0,0 +1,144 @@
+import json
+import os
+import shutil
+import time
+import numpy as np
+from config import Config
+from app.helpers.logger import setup_logger
+
+logger = setup_logger("detection")
+
+BACKENDS = ("torch", "onnx")
+PRECISIONS = ("fp32", "fp16", "int8")
+
+
+def _export_device(precision):
+    # Export FP16 ultralytics hanya berjalan di GPU; di CPU flag half diabaikan
+    # dan hasilnya tetap FP32
+    return 0 if precision == "fp16" else "cpu"
+
+
+def _resolve_precision(precision):
+    precision = precision or Config.DETECTION_PRECISION
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unsupported precision '{precision}', use one of {PRECISIONS}")
+    if precision == "fp16":
+        import torch
+
+        if not torch.cuda.is_available():
+            raise ValueError("Precision 'fp16' requires a CUDA GPU for export, use 'fp32' or 'int8' on CPU hosts")
+    return precision
+
+
+def _fingerprint(model_path, imgsz, precision):
+    stat = os.stat(model_path)
+    return {
+        "source": os.path.abspath(model_path),
+        "size": stat.st_size,
+        "mtime": int(stat.st_mtime),
+        "imgsz": imgsz,
+        "precision": precision,
+        "device": _export_device(precision),
+    }
+
+
+def _cached_artifact(model_path, imgsz, precision, cache_dir):
+    stem = os.path.splitext(os.path.basename(model_path))[0]
+    artifact = os.path.join(cache_dir, f"{stem}_{imgsz}_{precision}.onnx")
+    return artifact, f"{artifact}.json"
+
+
+def _quantize_int8(onnx_path, output_path):
+    # onnxruntime hanya dibutuhkan jika precision int8 dipakai
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    quantize_dynamic(onnx_path, output_path, weight_type=QuantType.QUInt8)
+
+
+def export_onnx(model_path, imgsz=None, precision=None, cache_dir=None):
+    """
+    Export checkpoint PyTorch ke ONNX sekali lalu simpan di cache. Start berikutnya
+    memakai artifact yang sudah ada selama checkpoint sumber tidak berubah.
+    """
+    imgsz = imgsz or Config.DETECTION_IMGSZ
+    precision = _resolve_precision(precision)
+    cache_dir = cache_dir or Config.MODEL_CACHE_DIR
+
+    artifact, meta_path = _cached_artifact(model_path, imgsz, precision, cache_dir)
+    fingerprint = _fingerprint(model_path, imgsz, precision)
+
+    if os.path.exists(artifact) and os.path.exists(meta_path):
+        with open(meta_path) as f:
+            if json.load(f) == fingerprint:
+                logger.info(f"Using cached ONNX model: {artifact}")
+                return artifact
+
+    logger.info(f"Exporting {model_path} to ONNX ({precision}, imgsz={imgsz})...")
+    os.makedirs(cache_dir, exist_ok=True)
+    started = time.perf_counter()
+
+    from ultralytics import YOLO
+
+    # dynamic=True supaya batch inference lintas kamera tetap bisa dipakai
+    exported = YOLO(model_path, task='detect').export(
+        format="onnx", imgsz=imgsz, dynamic=True, simplify=True,
+        half=precision == "fp16", device=_export_device(precision),
+    )
+
+    if precision == "int8":
+        _quantize_int8(exported, artifact)
+        os.remove(exported)
+    else:
+        shutil.move(exported, artifact)
+
+    with open(meta_path, "w") as f:
+        json.dump(fingerprint, f)
+
+    logger.info(f"ONNX model exported to {artifact} in {time.perf_counter() - started:.1f}s")
+    return artifact
+
+
+def warm_up(model, imgsz=None, runs=None):
+    """
+    Jalankan inference dummy agar inisialisasi predictor/session tidak
+    terjadi pada frame pertama yang asli.
+    """
+    imgsz = imgsz or Config.DETECTION_IMGSZ
+    runs = Config.DETECTION_WARMUP_RUNS if runs is None else runs
+    dummy = np.zeros((imgsz, imgsz, 3), dtype=np.uint8)
+    started = time.perf_counter()
+    for _ in range(runs):
+        model(dummy, imgsz=imgsz, verbose=False)
+    if runs:
+        logger.info(f"Model warm-up finished in {time.perf_counter() - started:.2f}s ({runs} run(s))")
+
+
+def load_model(model_path, backend=None, imgsz=None, precision=None):
+    """
+    Load model sesuai DETECTION_BACKEND. Backend onnx memakai artifact hasil
+    export yang di-cache; jika export gagal, kembali ke checkpoint PyTorch.
+    """
+    backend = backend or Config.DETECTION_BACKEND
+    imgsz = imgsz or Config.DETECTION_IMGSZ
+    if backend not in BACKENDS:
+        raise ValueError(f"Unsupported detection backend '{backend}', use one of {BACKENDS}")
+    if backend == "onnx":
+        # Precision yang tidak didukung host adalah salah konfigurasi, bukan
+        # kegagalan export, jadi tidak di-fallback ke checkpoint PyTorch
+        precision = _resolve_precision(precision)
+
+    started = time.perf_counter()
+    weights = model_path
+    if backend == "onnx" and model_path.endswith(".pt"):
+        try:
+            weights = export_onnx(model_path, imgsz=imgsz, precision=precision)
+        except Exception as e:
+            logger.warning(f"ONNX export failed, falling back to PyTorch model: {e}")
+
+    # ultralytics (dan torch) baru di-import saat model benar-benar di-load
+    from ultralytics import YOLO
+
+    model = YOLO(weights, task='detect')
+    warm_up(model, imgsz=imgsz)
+    logger.info(f"Model {weights} ready in {time.perf_counter() - started:.2f}s")
+    return model
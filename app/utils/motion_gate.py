@@ -0,0 +1,75 @@
+import time
+import cv2
+from config import Config
+
+
+class MotionGate:
+    """
+    Pre-filter murah sebelum inference: frame differencing pada salinan
+    grayscale yang diperkecil. Frame dengan gerakan selalu di-infer; saat
+    sepi, stride antar inference berlipat ganda sampai max_stride dan tetap
+    ada inference keep-alive minimal setiap keepalive_interval detik.
+    """
+
+    def __init__(self, downscale_width=None, pixel_threshold=None, min_area=None,
+                 max_stride=None, keepalive_interval=None):
+        self.downscale_width = downscale_width or Config.MOTION_DOWNSCALE_WIDTH
+        self.pixel_threshold = Config.MOTION_PIXEL_THRESHOLD if pixel_threshold is None else pixel_threshold
+        self.min_area = Config.MOTION_MIN_AREA if min_area is None else min_area
+        self.max_stride = max_stride or Config.MOTION_MAX_STRIDE
+        self.keepalive_interval = Config.MOTION_KEEPALIVE_SECONDS if keepalive_interval is None else keepalive_interval
+
+        self.stride = 1
+        self.frames_inferred = 0
+        self.frames_skipped = 0
+        self._previous = None
+        self._frames_since_infer = 0
+        self._last_infer_at = None
+
+    def _prepare(self, frame):
+        height, width = frame.shape[:2]
+        scale = self.downscale_width / float(width)
+        small = cv2.resize(frame, (self.downscale_width, max(1, int(height * scale))),
+                           interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+        return cv2.GaussianBlur(gray, (5, 5), 0)
+
+    def has_motion(self, frame):
+        current = self._prepare(frame)
+        previous, self._previous = self._previous, current
+        if previous is None or previous.shape != current.shape:
+            return True
+
+        diff = cv2.absdiff(previous, current)
+        _, mask = cv2.threshold(diff, self.pixel_threshold, 255, cv2.THRESH_BINARY)
+        return cv2.countNonZero(mask) > self.min_area * mask.size
+
+    def should_infer(self, frame, now=None):
+        now = time.monotonic() if now is None else now
+        self._frames_since_infer += 1
+
+        if self.has_motion(frame):
+            # Ada aktivitas, kembali infer setiap frame
+            self.stride = 1
+            infer = True
+        elif self._frames_since_infer >= self.stride:
+            # Sepi, jarak antar inference makin panjang
+            self.stride = min(self.stride * 2, self.max_stride)
+            infer = True
+        else:
+            infer = self._last_infer_at is None or now - self._last_infer_at >= self.keepalive_interval
+
+        if infer:
+            self.frames_inferred += 1
+            self._frames_since_infer = 0
+            self._last_infer_at = now
+        else:
+            self.frames_skipped += 1
+        return infer
+
+    def stats(self):
+        return {
+            "frames_inferred": self.frames_inferred,
+            "frames_skipped": self.frames_skipped,
+            "stride": self.stride,
+        }
@@ -0,0 +1,134 @@
+from firebase_admin import messaging, exceptions
+from sqlalchemy import select, update
+from config import Config
+from app import db
+from app.models import User
+from app.helpers.ids import as_uuid
+from app.helpers.logger import setup_logger
+from app.utils.firebase_utils import get_firebase_app
+from app.helpers.metrics import NOTIFICATIONS_SENT, NOTIFICATION_TOKENS_PRUNED
+
+logger = setup_logger("Notification")
+
+
+def is_invalid_token_error(error):
+    """
+    Token yang sudah tidak terdaftar atau bukan token FCM yang valid.
+    InvalidArgumentError juga dipakai untuk payload yang salah, jadi hanya
+    dianggap token invalid jika pesannya menyebut token.
+    """
+    if isinstance(error, (messaging.UnregisteredError, messaging.SenderIdMismatchError)):
+        return True
+    return isinstance(error, exceptions.InvalidArgumentError) and "token" in str(error).lower()
+
+
+class NotificationFanout:
+    """
+    Mengirim notifikasi laporan ke owner dan semua polisi dalam radius.
+    Token semua penerima diambil dengan satu query, dikirim per batch lewat
+    send_each_for_multicast (maks. 500 token per request), lalu token yang
+    ditolak FCM sebagai invalid dihapus dari database.
+
+    client adalah objek dengan send_each_for_multicast(MulticastMessage);
+    default-nya modul firebase_admin.messaging, dengan app Firebase yang
+    baru di-inisialisasi saat notifikasi pertama dikirim.
+    """
+
+    def __init__(self, client=None, batch_size=None):
+        self._client = client
+        self.batch_size = min(batch_size or Config.FCM_MULTICAST_BATCH_SIZE, 500)
+
+    @property
+    def client(self):
+        if self._client is None:
+            get_firebase_app()
+            self._client = messaging
+        return self._client
+
+    def load_tokens(self, user_ids):
+        ids = {as_uuid(user_id) for user_id in user_ids} - {None}
+        if not ids:
+            return {}
+        rows = db.session.execute(
+            select(User.id, User.fcm_token).where(User.id.in_(ids), User.fcm_token.isnot(None))
+        )
+        return {user_id: token for user_id, token in rows if token}
+
+    def _send(self, audience, tokens, notification, data):
+        """
+        Mengembalikan (jumlah terkirim, token invalid).
+        """
+        sent, invalid = 0, []
+        for start in range(0, len(tokens), self.batch_size):
+            chunk = tokens[start:start + self.batch_size]
+            response = self.client.send_each_for_multicast(messaging.MulticastMessage(
+                tokens=chunk, notification=notification, data=data,
+            ))
+            sent += response.success_count
+            for token, result in zip(chunk, response.responses):
+                if result.success:
+                    continue
+                if is_invalid_token_error(result.exception):
+                    invalid.append(token)
+                else:
+                    logger.warning(f"FCM send to {audience} failed: {result.exception}")
+            NOTIFICATIONS_SENT.labels(audience=audience, result="success").inc(response.success_count)
+            NOTIFICATIONS_SENT.labels(audience=audience, result="failed").inc(response.failure_count)
+        return sent, invalid
+
+    def prune_tokens(self, tokens):
+        if not tokens:
+            return 0
+        db.session.execute(update(User).where(User.fcm_token.in_(tokens)).values(fcm_token=None))
+        db.session.commit()
+        NOTIFICATION_TOKENS_PRUNED.inc(len(tokens))
+        logger.info(f"Pruned {len(tokens)} invalid FCM token(s).")
+        return len(tokens)
+
+    def _notify_audience(self, audience, tokens, notification, data):
+        sent, invalid = self._send(audience, tokens, notification, data) if tokens else (0, [])
+        return sent, self.prune_tokens(invalid)
+
+    def notify_report(self, owner_id, report, done=None):
+        """
+        done adalah set audience ("owner", "police") yang sudah terkirim untuk
+        event ini. Audience di dalamnya dilewati dan setiap audience yang
+        selesai ditambahkan, sehingga retry setelah pengiriman ke polisi gagal
+        tidak mengirim ulang notifikasi ke owner.
+        """
+        done = set() if done is None else done
+        owner_uuid = as_uuid(owner_id)
+        police_ids = [police.get("id") for police in report.get("police_in_radius", [])]
+        tokens = self.load_tokens([
+            *([owner_id] if "owner" not in done else []),
+            *(police_ids if "police" not in done else []),
+        ])
+
+        owner_tokens = [tokens[owner_uuid]] if owner_uuid in tokens else []
+        police_tokens = list(dict.fromkeys(
+            token for user_id, token in tokens.items() if user_id != owner_uuid
+        ))
+        data = {
+            "report_id": str(report.get("report_id", "")),
+            "owner_id": str(report.get("owner_id", "")),
+        }
+
+        result = {"owner": 0, "police": 0, "pruned": 0}
+        if "owner" not in done:
+            result["owner"], pruned = self._notify_audience("owner", owner_tokens, messaging.Notification(
+                title="Perampokan Terdeteksi!",
+                body=f"Laporan baru: {report.get('description', 'No description available')}",
+            ), data)
+            result["pruned"] += pruned
+            done.add("owner")
+        if "police" not in done:
+            result["police"], pruned = self._notify_audience("police", police_tokens, messaging.Notification(
+                title="Laporan Perampokan di Sekitar Anda",
+                body=f"Telah terjadi perampokan di {report.get('address', 'lokasi tidak diketahui')}",
+            ), data)
+            result["pruned"] += pruned
+            done.add("police")
+
+        logger.info(f"Report {data['report_id']}: notified owner ({result['owner']}/{len(owner_tokens)}) "
+                    f"and police ({result['police']}/{len(police_tokens)}), pruned {result['pruned']} token(s).")
+        return result
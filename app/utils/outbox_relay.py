@@ -0,0 +1,172 @@
+import threading
+import uuid
+from datetime import datetime, timedelta
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from config import Config
+from app import db
+from app.models import OutboxEvent
+from app.utils.event_transport import flush_events, produce_event
+from app.helpers.logger import setup_logger
+from app.helpers.metrics import OUTBOX_EVENTS, OUTBOX_OLDEST_EVENT_AGE_SECONDS
+
+logger = setup_logger("outbox")
+
+# Dibangunkan setelah commit yang menulis outbox agar event tidak menunggu interval poll
+_wakeup = threading.Event()
+
+
+def outbox_row(topic, key, payload, event_id=None):
+    """
+    Baris untuk insert(OutboxEvent) di dalam transaksi pemanggil.
+    """
+    return {
+        "id": event_id or uuid.uuid4(),
+        "topic": topic,
+        "key": key,
+        "payload": payload if isinstance(payload, bytes) else payload.encode("utf-8"),
+        "attempts": 0,
+        "next_attempt_at": datetime.utcnow(),
+    }
+
+
+def wake_outbox_relay():
+    _wakeup.set()
+
+
+class OutboxRelay:
+    """
+    Mengirim OutboxEvent ke event transport per batch. Event dihapus hanya
+    setelah delivery callback-nya melaporkan pesan diterima broker; jika
+    ditolak atau belum terkonfirmasi setelah flush, event dicoba lagi dengan
+    backoff eksponensial. Batch diklaim dalam transaksi singkat (FOR UPDATE
+    SKIP LOCKED + next_attempt_at dimundurkan) sehingga beberapa relay boleh
+    berjalan bersamaan tanpa menahan transaksi selama menunggu broker.
+    Pengiriman bersifat at-least-once, consumer men-dedup dengan event id.
+    """
+
+    def __init__(self, app, batch_size=None, poll_interval=None):
+        self.app = app
+        self.batch_size = batch_size or Config.OUTBOX_BATCH_SIZE
+        self.poll_interval = Config.OUTBOX_POLL_INTERVAL_SECONDS if poll_interval is None else poll_interval
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="outbox-relay", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=5.0):
+        self._stop_event.set()
+        _wakeup.set()
+        self._thread.join(timeout=timeout)
+
+    def _backoff(self, attempts):
+        return min(Config.OUTBOX_BACKOFF_SECONDS * (2 ** (attempts - 1)), Config.OUTBOX_MAX_BACKOFF_SECONDS)
+
+    def _claim(self, now):
+        """
+        Transaksi pertama: mengunci batch dengan FOR UPDATE SKIP LOCKED lalu
+        memundurkan next_attempt_at sejauh OUTBOX_CLAIM_SECONDS, dan langsung
+        commit. Relay lain tidak mengambil event yang sama selama klaim
+        berlaku; jika relay ini mati sebelum selesai, event dicoba lagi
+        setelah klaim habis.
+        """
+        events = db.session.execute(
+            select(OutboxEvent.id, OutboxEvent.topic, OutboxEvent.key, OutboxEvent.payload,
+                   OutboxEvent.attempts, OutboxEvent.created_at)
+            .where(OutboxEvent.next_attempt_at <= now)
+            .order_by(OutboxEvent.created_at)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+        ).all()
+        if events:
+            db.session.execute(
+                update(OutboxEvent)
+                .where(OutboxEvent.id.in_([event.id for event in events]))
+                .values(next_attempt_at=now + timedelta(seconds=Config.OUTBOX_CLAIM_SECONDS))
+            )
+        db.session.commit()
+        return events
+
+    def relay_batch(self):
+        """
+        Mengirim satu batch. Mengembalikan jumlah event yang berhasil dikirim.
+        Produce dan flush berjalan di luar transaksi, sehingga broker yang
+        lambat tidak menahan lock baris atau transaksi database.
+        """
+        now = datetime.utcnow()
+        events = self._claim(now)
+        if not events:
+            OUTBOX_OLDEST_EVENT_AGE_SECONDS.set(0)
+            return 0
+
+        OUTBOX_OLDEST_EVENT_AGE_SECONDS.set((now - events[0].created_at).total_seconds())
+
+        # Hasil pengiriman per event dari delivery callback: None = diterima broker
+        delivered = {}
+
+        def on_delivery(event_id):
+            def callback(err):
+                delivered[event_id] = err
+            return callback
+
+        produced, failed = [], []
+        for event in events:
+            try:
+                produce_event(event.topic, key=event.key, value=event.payload, on_delivery=on_delivery(event.id))
+                produced.append(event)
+            except Exception as e:
+                failed.append((event, e))
+
+        sent = []
+        if produced:
+            flush_events()
+            # Hapus hanya event yang dikonfirmasi broker; pesan yang ditolak
+            # atau belum terkonfirmasi saat timeout dicoba lagi
+            for event in produced:
+                if event.id not in delivered:
+                    failed.append((event, RuntimeError("delivery not confirmed before flush timeout")))
+                elif delivered[event.id] is not None:
+                    failed.append((event, RuntimeError(f"delivery failed: {delivered[event.id]}")))
+                else:
+                    sent.append(event)
+
+        # Transaksi kedua, singkat: hapus yang terkirim, jadwalkan ulang yang gagal
+        retry_at = datetime.utcnow()
+        for event, error in failed:
+            attempts = event.attempts + 1
+            db.session.execute(
+                update(OutboxEvent)
+                .where(OutboxEvent.id == event.id)
+                .values(attempts=attempts, last_error=str(error),
+                        next_attempt_at=retry_at + timedelta(seconds=self._backoff(attempts)))
+            )
+            logger.warning(f"Outbox event {event.id} failed (attempt {attempts}): {error}")
+        if sent:
+            db.session.execute(delete(OutboxEvent).where(OutboxEvent.id.in_([event.id for event in sent])))
+        db.session.commit()
+
+        OUTBOX_EVENTS.labels(result="published").inc(len(sent))
+        OUTBOX_EVENTS.labels(result="failed").inc(len(failed))
+        return len(sent)
+
+    def _run(self):
+        logger.info("Outbox relay started.")
+        while not self._stop_event.is_set():
+            try:
+                with self.app.app_context():
+                    sent = self.relay_batch()
+            except SQLAlchemyError as e:
+                logger.error(f"Outbox relay database error: {e}")
+                sent = 0
+            except Exception as e:
+                logger.error(f"Outbox relay error: {e}")
+                sent = 0
+
+            # Batch penuh: kemungkinan masih ada event, langsung lanjut
+            if sent >= self.batch_size:
+                continue
+            _wakeup.wait(self.poll_interval)
+            _wakeup.clear()
+        logger.info("Outbox relay stopped.")
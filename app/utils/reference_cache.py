@@ -0,0 +1,109 @@
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from config import Config
+from app.models import User, CCTV, parse_coordinate
+
+OwnerProfile = namedtuple("OwnerProfile", ["id", "name", "address", "latitude", "longitude"])
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Cache LRU dengan batas ukuran dan TTL per entry, aman dipakai lintas thread.
+    """
+
+    def __init__(self, maxsize=None, ttl=None):
+        self.maxsize = maxsize or Config.REFERENCE_CACHE_MAX_SIZE
+        self.ttl = Config.REFERENCE_CACHE_TTL_SECONDS if ttl is None else ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING or entry[1] <= now:
+                if entry is not _MISSING:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def invalidate_values(self, values):
+        with self._lock:
+            for key in [key for key, (value, _) in self._data.items() if value in values]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+# cctv_ip -> owner_id
+cctv_owner_cache = TTLCache()
+# owner_id -> OwnerProfile
+owner_profile_cache = TTLCache()
+
+
+def owner_profile_from_user(user):
+    latitude = user.latitude if user.latitude is not None else parse_coordinate(user.lat)
+    longitude = user.longitude if user.longitude is not None else parse_coordinate(user.lang)
+    return OwnerProfile(user.id, user.name, user.address, latitude, longitude)
+
+
+# Invalidasi eksplisit saat baris CCTV atau User berubah di proses ini.
+# Perubahan dari proses lain kedaluwarsa lewat TTL.
+@event.listens_for(Session, "after_flush")
+def _collect_reference_changes(session, flush_context):
+    cctv_ips = session.info.setdefault("reference_cache_cctv_ips", set())
+    cctv_owner_ids = session.info.setdefault("reference_cache_cctv_owner_ids", set())
+    owner_ids = session.info.setdefault("reference_cache_owner_ids", set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, CCTV):
+            # Nilai lama cctv_ip belum tentu ter-load (atribut expired), jadi
+            # entry yang menunjuk ke owner kamera ini juga dihapus
+            state = inspect(obj)
+            cctv_ips.add(obj.cctv_ip)
+            cctv_ips.update(state.attrs.cctv_ip.history.deleted)
+            cctv_owner_ids.add(obj.user_id)
+            cctv_owner_ids.update(state.attrs.user_id.history.deleted)
+        elif isinstance(obj, User):
+            owner_ids.add(obj.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_reference_changes(session):
+    for cctv_ip in session.info.pop("reference_cache_cctv_ips", ()):
+        cctv_owner_cache.invalidate(cctv_ip)
+    cctv_owner_cache.invalidate_values(session.info.pop("reference_cache_cctv_owner_ids", set()))
+    for owner_id in session.info.pop("reference_cache_owner_ids", ()):
+        owner_profile_cache.invalidate(owner_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_reference_changes(session):
+    session.info.pop("reference_cache_cctv_ips", None)
+    session.info.pop("reference_cache_cctv_owner_ids", None)
+    session.info.pop("reference_cache_owner_ids", None)
@@ -0,0 +1,118 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from config import Config
+from app.helpers.logger import setup_logger
+from app.helpers.metrics import DETECTOR_QUEUE_DEPTH
+
+logger = setup_logger("report")
+
+
+class _PendingReport:
+    __slots__ = ("owner_id", "images", "description", "future")
+
+    def __init__(self, owner_id, images, description):
+        self.owner_id = owner_id
+        self.images = images
+        self.description = description
+        self.future = Future()
+
+    def image_urls(self):
+        urls = []
+        for image in self.images:
+            url = image.result() if isinstance(image, Future) else image
+            if url:
+                urls.append(url)
+        return urls
+
+
+class ReportBatcher:
+    """
+    Mengumpulkan laporan dari semua kamera lalu menyimpannya dengan satu
+    pemanggilan create_reports (satu transaksi), sampai batch_size laporan
+    atau max_wait detik. Laporan baru masuk antrian setelah semua Future
+    upload gambarnya selesai, sehingga kamera tidak pernah menunggu.
+    """
+
+    def __init__(self, app, create_reports, batch_size=None, max_wait=None):
+        self.app = app
+        self.create_reports = create_reports
+        self.batch_size = batch_size or Config.REPORT_BATCH_SIZE
+        self.max_wait = Config.REPORT_BATCH_MAX_WAIT_MS / 1000.0 if max_wait is None else max_wait
+
+        self._queue = queue.Queue()
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="report-batcher", daemon=True)
+
+    def start(self):
+        DETECTOR_QUEUE_DEPTH.labels(queue="report").set_function(self._queue.qsize)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=5.0):
+        self._stop_event.set()
+        self._thread.join(timeout=timeout)
+
+    def submit(self, owner_id, images, description):
+        """
+        images boleh berisi URL atau Future URL dari UploadQueue.
+        Mengembalikan Future berisi hasil create_reports untuk laporan ini.
+        """
+        report = _PendingReport(owner_id, images, description)
+        pending = [image for image in images if isinstance(image, Future)]
+        if not pending:
+            self._queue.put(report)
+            return report.future
+
+        remaining = [len(pending)]
+        lock = threading.Lock()
+
+        def _on_upload_done(_):
+            with lock:
+                remaining[0] -= 1
+                ready = remaining[0] == 0
+            if ready:
+                self._queue.put(report)
+
+        for image in pending:
+            image.add_done_callback(_on_upload_done)
+        return report.future
+
+    def _next_batch(self):
+        try:
+            batch = [self._queue.get(timeout=1.0)]
+        except queue.Empty:
+            return []
+
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not self._stop_event.is_set() or not self._queue.empty():
+            batch = self._next_batch()
+            if not batch:
+                continue
+
+            try:
+                items = [
+                    {"owner_id": report.owner_id, "images": report.image_urls(), "description": report.description}
+                    for report in batch
+                ]
+                with self.app.app_context():
+                    results = self.create_reports(items)
+                for report, result in zip(batch, results):
+                    report.future.set_result(result)
+            except Exception as e:
+                logger.error(f"Error creating report batch: {e}")
+                for report in batch:
+                    if not report.future.done():
+                        report.future.set_exception(e)
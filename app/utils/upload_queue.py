@@ -0,0 +1,154 @@
+import os
+import queue
+import threading
+from concurrent.futures import Future
+from config import Config
+from app.helpers.logger import setup_logger
+from app.helpers.metrics import DETECTOR_QUEUE_DEPTH, DETECTOR_STAGE_SECONDS, DETECTOR_UPLOADS
+
+logger = setup_logger("upload")
+
+
+class UploadQueue:
+    """
+    Pipeline upload gambar bukti di background: queue terbatas, sejumlah
+    worker tetap, retry dengan backoff, dan spool lokal di disk jika storage
+    tidak bisa dihubungi. File di spool di-upload ulang saat worker senggang.
+
+    storage adalah client dengan interface Supabase:
+    storage.storage.from_(bucket).upload(path, data) dan .get_public_url(path).
+    """
+
+    def __init__(self, storage, bucket="foto-maling", workers=None, max_queue=None,
+                 max_retries=None, backoff=None, spool_dir=None):
+        self.storage = storage
+        self.bucket = bucket
+        self.workers = workers or Config.UPLOAD_WORKERS
+        self.max_retries = Config.UPLOAD_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff = Config.UPLOAD_BACKOFF_SECONDS if backoff is None else backoff
+        self.spool_dir = spool_dir or Config.UPLOAD_SPOOL_DIR
+        self.uploaded = 0
+        self.failed = 0
+        self.spooled = 0
+
+        self._queue = queue.Queue(maxsize=max_queue or Config.UPLOAD_QUEUE_SIZE)
+        self._stop_event = threading.Event()
+        self._spool_lock = threading.Lock()
+        self._threads = [
+            threading.Thread(target=self._run, name=f"upload-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+
+    def start(self):
+        DETECTOR_QUEUE_DEPTH.labels(queue="upload").set_function(self.queue_depth)
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self, timeout=5.0):
+        self._stop_event.set()
+        for thread in self._threads:
+            thread.join(timeout=timeout)
+
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def submit(self, path, data):
+        """
+        Menjadwalkan upload tanpa blocking. Future berisi public URL setelah
+        upload berhasil atau file masuk spool (URL valid setelah spool
+        terkirim), atau None jika gagal total.
+        """
+        future = Future()
+        try:
+            self._queue.put_nowait((path, data, future))
+        except queue.Full:
+            logger.warning(f"Upload queue full, spooling {path} to disk.")
+            future.set_result(self._spool(path, data))
+        return future
+
+    def _bucket(self):
+        return self.storage.storage.from_(self.bucket)
+
+    def _upload(self, path, data):
+        with DETECTOR_STAGE_SECONDS.labels(stage="upload").time():
+            self._bucket().upload(path, data)
+        return self._bucket().get_public_url(path)
+
+    def _upload_with_retry(self, path, data):
+        for attempt in range(self.max_retries + 1):
+            try:
+                return self._upload(path, data)
+            except Exception as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = self.backoff * (2 ** attempt)
+                logger.warning(f"Upload of {path} failed ({e}), retrying in {delay:.1f}s")
+                if self._stop_event.wait(delay):
+                    raise
+
+    def _run(self):
+        while not self._stop_event.is_set() or not self._queue.empty():
+            try:
+                path, data, future = self._queue.get(timeout=1.0)
+            except queue.Empty:
+                self._drain_spool()
+                continue
+
+            try:
+                url = self._upload_with_retry(path, data)
+                self.uploaded += 1
+                DETECTOR_UPLOADS.labels(result="success").inc()
+                future.set_result(url)
+            except Exception as e:
+                logger.error(f"Error uploading image {path}: {e}")
+                future.set_result(self._spool(path, data))
+            finally:
+                self._queue.task_done()
+
+    def _spool_path(self, path):
+        return os.path.join(self.spool_dir, *path.split("/"))
+
+    def _spool(self, path, data):
+        try:
+            spool_path = self._spool_path(path)
+            os.makedirs(os.path.dirname(spool_path), exist_ok=True)
+            tmp_path = f"{spool_path}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, spool_path)
+            self.spooled += 1
+            DETECTOR_UPLOADS.labels(result="spooled").inc()
+            return self._bucket().get_public_url(path)
+        except Exception as e:
+            logger.error(f"Error spooling image {path}: {e}")
+            self.failed += 1
+            DETECTOR_UPLOADS.labels(result="failed").inc()
+            return None
+
+    def _drain_spool(self):
+        if not os.path.isdir(self.spool_dir):
+            return
+        # Cukup satu worker yang mengirim ulang spool
+        if not self._spool_lock.acquire(blocking=False):
+            return
+        try:
+            for root, _, files in os.walk(self.spool_dir):
+                for name in files:
+                    if name.endswith(".tmp") or self._stop_event.is_set():
+                        continue
+                    spool_path = os.path.join(root, name)
+                    path = os.path.relpath(spool_path, self.spool_dir).replace(os.sep, "/")
+                    with open(spool_path, "rb") as f:
+                        data = f.read()
+                    try:
+                        self._upload(path, data)
+                    except Exception as e:
+                        logger.warning(f"Storage still unreachable, keeping spool ({e})")
+                        return
+                    os.remove(spool_path)
+                    self.uploaded += 1
+                    DETECTOR_UPLOADS.labels(result="success").inc()
+                    logger.info(f"Uploaded spooled image {path}")
+        finally:
+            self._spool_lock.release()
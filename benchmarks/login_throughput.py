@@ -0,0 +1,118 @@
+"""
+Mengukur throughput endpoint login (/api/v1/login) dengan beberapa client
+paralel terhadap database SQLite sementara. Hasil berupa JSON: login per
+detik total dan per core yang dipakai worker hashing.
+
+Contoh:
+    python -m benchmarks.login_throughput --threads 8 --duration 10
+    python -m benchmarks.login_throughput --method pbkdf2:sha256:600000 --seed-method scrypt
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from config import Config
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark throughput login.")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--threads", type=int, default=8, help="Jumlah client paralel")
+    parser.add_argument("--duration", type=float, default=10.0, help="Lama benchmark (detik)")
+    parser.add_argument("--method", default=Config.PASSWORD_HASH_METHOD, help="PASSWORD_HASH_METHOD")
+    parser.add_argument("--seed-method", help="Method hash awal user (default sama dengan --method); "
+                                              "jika berbeda, login pertama tiap user melakukan rehash")
+    parser.add_argument("--workers", type=int, default=Config.PASSWORD_HASH_WORKERS or os.cpu_count() or 1)
+    parser.add_argument("--output", help="Tulis hasil JSON ke file")
+    return parser.parse_args(argv)
+
+
+def run_benchmark(args):
+    db_path = os.path.join(tempfile.mkdtemp(prefix="login-bench-"), "bench.db")
+    Config.SQLALCHEMY_DATABASE_URI = f"sqlite:///{db_path}"
+    Config.SQLALCHEMY_ENGINE_OPTIONS = {}
+    Config.JWT_SECRET_KEY = Config.JWT_SECRET_KEY or os.urandom(32).hex()
+    Config.PASSWORD_HASH_METHOD = args.method
+    Config.PASSWORD_HASH_WORKERS = args.workers
+    # Client disimulasikan lewat X-Forwarded-For, seperti di belakang load balancer
+    Config.TRUSTED_PROXY_COUNT = 1
+
+    from werkzeug.security import generate_password_hash
+    from app import create_app, db
+    from app.models import User, RoleEnum
+
+    app = create_app()
+    password = "bench-password"
+    with app.app_context():
+        db.create_all()
+        seed_hash = generate_password_hash(password, method=args.seed_method or args.method)
+        db.session.add_all([
+            User(email=f"user{i}@bench.local", password=seed_hash, role=RoleEnum.OWNER)
+            for i in range(args.users)
+        ])
+        db.session.commit()
+
+    counts = {"ok": 0, "error": 0}
+    latencies = []
+    lock = threading.Lock()
+    deadline = time.monotonic() + args.duration
+
+    def client(index):
+        test_client = app.test_client()
+        i = index
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            # Setiap request dari IP client yang berbeda
+            response = test_client.post("/api/v1/login", json={
+                "email": f"user{i % args.users}@bench.local", "password": password,
+            }, headers={"X-Forwarded-For": f"10.{(i >> 16) & 255}.{(i >> 8) & 255}.{i & 255}"})
+            elapsed = time.perf_counter() - started
+            with lock:
+                counts["ok" if response.status_code == 200 else "error"] += 1
+                latencies.append(elapsed)
+            i += args.threads
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(args.threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    cores = min(args.workers, os.cpu_count() or 1)
+
+    def percentile(p):
+        return round(latencies[min(int(len(latencies) * p), len(latencies) - 1)] * 1000, 2) if latencies else None
+
+    return {
+        "method": args.method,
+        "seed_method": args.seed_method or args.method,
+        "threads": args.threads,
+        "hash_workers": args.workers,
+        "cores": cores,
+        "logins": counts["ok"],
+        "errors": counts["error"],
+        "logins_per_second": round(counts["ok"] / elapsed, 1),
+        "logins_per_second_per_core": round(counts["ok"] / elapsed / cores, 1),
+        "latency_ms": {"p50": percentile(0.5), "p95": percentile(0.95), "p99": percentile(0.99)},
+    }
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    result = run_benchmark(args)
+    output = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        sys.stdout.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Mengukur throughput jalur notifikasi (produce -> BatchConsumer -> handler)
+memakai transport lokal, tanpa Kafka, database maupun FCM. Handler hanya
+men-decode event lalu menunggu --handler-latency untuk mensimulasikan
+request FCM.
+
+Contoh:
+    python -m benchmarks.notification_throughput --transport memory --events 5000
+    python -m benchmarks.notification_throughput --transport file --log-dir /tmp/eventlog --workers 16
+"""
+import argparse
+import json
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from config import Config
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark throughput notifikasi dengan transport lokal.")
+    parser.add_argument("--transport", choices=["memory", "file"], default="memory")
+    parser.add_argument("--log-dir", help="Direktori log untuk transport file (default: direktori sementara)")
+    parser.add_argument("--events", type=int, default=2000)
+    parser.add_argument("--owners", type=int, default=50, help="Jumlah key (owner) berbeda")
+    parser.add_argument("--batch-size", type=int, default=Config.KAFKA_CONSUMER_BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=Config.KAFKA_CONSUMER_WORKERS)
+    parser.add_argument("--handler-latency", type=float, default=5.0, help="Latency handler (ms)")
+    parser.add_argument("--output", help="Tulis hasil JSON ke file")
+    return parser.parse_args(argv)
+
+
+def run_benchmark(args):
+    from app.utils.event_transport import BatchConsumer, FileLog, LocalTransport, MemoryLog
+
+    log_dir = None
+    if args.transport == "file":
+        log_dir = args.log_dir or tempfile.mkdtemp(prefix="eventlog-")
+        transport = LocalTransport(FileLog(log_dir))
+    else:
+        transport = LocalTransport(MemoryLog())
+
+    topic = "benchmark-notifications"
+    payload = {"report": {"report_id": "0" * 36, "description": "benchmark", "police_in_radius": []}}
+
+    started = time.perf_counter()
+    for i in range(args.events):
+        owner_id = f"owner-{i % args.owners}"
+        transport.produce(topic, owner_id, json.dumps({"user_id": owner_id, "seq": i, **payload}))
+    produce_seconds = time.perf_counter() - started
+
+    handled = [0]
+    out_of_order = [0]
+    last_seq = {}
+    lock = threading.Lock()
+    done = threading.Event()
+    latency = args.handler_latency / 1000.0
+
+    def handler(key, value):
+        event = json.loads(value)
+        if latency:
+            time.sleep(latency)
+        with lock:
+            if last_seq.get(key, -1) > event["seq"]:
+                out_of_order[0] += 1
+            last_seq[key] = event["seq"]
+            handled[0] += 1
+            if handled[0] >= args.events:
+                done.set()
+
+    consumer = BatchConsumer(
+        transport.create_consumer("benchmark"), handler, topics=[topic],
+        batch_size=args.batch_size, workers=args.workers, poll_timeout=0.1,
+    )
+    thread = threading.Thread(target=consumer.run, daemon=True)
+    started = time.perf_counter()
+    thread.start()
+    done.wait()
+    consume_seconds = time.perf_counter() - started
+    consumer.stop()
+    thread.join()
+    transport.close()
+    if log_dir and not args.log_dir:
+        shutil.rmtree(log_dir, ignore_errors=True)
+
+    return {
+        "transport": args.transport,
+        "events": args.events,
+        "owners": args.owners,
+        "batch_size": args.batch_size,
+        "workers": args.workers,
+        "handler_latency_ms": args.handler_latency,
+        "produce_events_per_second": round(args.events / produce_seconds, 1),
+        "consume_events_per_second": round(args.events / consume_seconds, 1),
+        "out_of_order": out_of_order[0],
+    }
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    result = run_benchmark(args)
+    output = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        sys.stdout.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
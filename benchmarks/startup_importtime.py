@@ -0,0 +1,146 @@
+"""
+Mengukur cold start tiap peran proses: waktu import (laporan `-X importtime`),
+wall time interpreter sampai modul peran selesai di-import, resident memory
+maksimum, dan dependency berat yang ikut ter-load. Setiap run memakai
+interpreter baru agar tidak ada modul yang sudah ter-cache.
+
+Contoh:
+    python -m benchmarks.startup_importtime
+    python -m benchmarks.startup_importtime --roles api --repeat 5 --top 15
+
+Hasil pengukuran terakhir disimpan di benchmarks/startup_importtime.json:
+    python -m benchmarks.startup_importtime --repeat 5 --top 8 --output benchmarks/startup_importtime.json
+"""
+import argparse
+import importlib.util
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Modul yang di-import oleh setiap peran (lihat run.py)
+ROLE_MODULES = {
+    "api": "run",
+    "detector": "app.utils.detection_supervisor",
+    "notifier": "app.controllers.notify_controller",
+}
+
+HEAVY_MODULES = [
+    "ultralytics", "torch", "cv2", "onnxruntime", "supabase",
+    "firebase_admin", "confluent_kafka", "numpy", "alembic",
+]
+
+CHILD_CODE = """
+import json, resource, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+print(json.dumps({{
+    "import_seconds": elapsed,
+    "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    "heavy_modules": [name for name in {heavy!r} if name in sys.modules],
+}}))
+"""
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark waktu import dan memori saat start.")
+    parser.add_argument("--roles", nargs="+", choices=sorted(ROLE_MODULES), default=sorted(ROLE_MODULES))
+    parser.add_argument("--repeat", type=int, default=3, help="Jumlah run per peran (diambil median)")
+    parser.add_argument("--top", type=int, default=10, help="Jumlah paket paling lambat yang dilaporkan")
+    parser.add_argument("--output", help="Tulis hasil JSON ke file")
+    return parser.parse_args(argv)
+
+
+def parse_importtime(stderr):
+    """
+    Baris `import time: self [us] | cumulative | nama` menjadi list
+    (nama, self_us, cumulative_us).
+    """
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        entries.append((name.strip(), int(self_us), int(cumulative_us)))
+    return entries
+
+
+def child_env():
+    env = dict(os.environ)
+    # Import tidak membuka koneksi database, tapi create_app butuh URI
+    env.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.gettempdir(), 'startup-bench.db')}")
+    env.setdefault("SECRET_KEY", "startup-bench")
+    return env
+
+
+def measure_role(role, top):
+    module = ROLE_MODULES[role]
+    code = CHILD_CODE.format(module=module, heavy=HEAVY_MODULES)
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, env=child_env(),
+    )
+    wall_seconds = time.perf_counter() - started
+    if completed.returncode != 0:
+        raise RuntimeError(f"Import {module} failed:\n{completed.stderr[-2000:]}")
+
+    entries = parse_importtime(completed.stderr)
+    child = json.loads(completed.stdout.strip().splitlines()[-1])
+    # Self time dijumlahkan per paket top-level, mis. sqlalchemy.* -> sqlalchemy
+    packages = {}
+    for name, self_us, _ in entries:
+        package = name.split(".", 1)[0]
+        packages[package] = packages.get(package, 0) + self_us
+    slowest = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+    return {
+        "wall_seconds": wall_seconds,
+        "import_seconds": child["import_seconds"],
+        "max_rss_mb": child["max_rss_kb"] / 1024,
+        "modules_imported": len(entries),
+        "heavy_modules": child["heavy_modules"],
+        "top_packages_ms": {package: round(self_us / 1000, 1) for package, self_us in slowest},
+    }
+
+
+def run_benchmark(args):
+    results = {}
+    for role in args.roles:
+        runs = [measure_role(role, args.top) for _ in range(args.repeat)]
+        results[role] = {
+            "module": ROLE_MODULES[role],
+            "wall_ms": round(statistics.median(r["wall_seconds"] for r in runs) * 1000, 1),
+            "import_ms": round(statistics.median(r["import_seconds"] for r in runs) * 1000, 1),
+            "max_rss_mb": round(statistics.median(r["max_rss_mb"] for r in runs), 1),
+            "modules_imported": runs[-1]["modules_imported"],
+            "heavy_modules": runs[-1]["heavy_modules"],
+            "top_packages_ms": runs[-1]["top_packages_ms"],
+        }
+    # Paket berat yang tidak terpasang juga tidak akan muncul di heavy_modules,
+    # jadi dicatat agar hasil antar environment bisa dibandingkan
+    installed = [name for name in HEAVY_MODULES if importlib.util.find_spec(name) is not None]
+    return {
+        "python": sys.version.split()[0],
+        "repeat": args.repeat,
+        "heavy_modules_installed": installed,
+        "roles": results,
+    }
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    result = run_benchmark(args)
+    output = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        sys.stdout.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
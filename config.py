@@ -11,6 +11,25 @@ class Config:
     # JWT Configuration
     JWT_SECRET_KEY = os.getenv("SECRET_KEY")
     JWT_ALGORITHM = "HS256"
+    JWT_EXPIRES_HOURS = float(os.getenv("JWT_EXPIRES_HOURS", 24))
+    # Cache token terverifikasi dan index revokasi (tabel tokens)
+    TOKEN_CACHE_MAX_SIZE = int(os.getenv("TOKEN_CACHE_MAX_SIZE", 10000))
+    TOKEN_REVOCATION_REFRESH_SECONDS = float(os.getenv("TOKEN_REVOCATION_REFRESH_SECONDS", 5))
+    TOKEN_REVOCATION_FULL_RELOAD_SECONDS = float(os.getenv("TOKEN_REVOCATION_FULL_RELOAD_SECONDS", 600))
+
+    # Password hashing & login throttling
+    PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "scrypt")  # mis. scrypt:32768:8:1, pbkdf2:sha256:600000
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", 0))  # 0 = jumlah CPU
+    PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", 32))
+    PASSWORD_HASH_QUEUE_TIMEOUT = float(os.getenv("PASSWORD_HASH_QUEUE_TIMEOUT", 2.0))
+    LOGIN_IP_MAX_ATTEMPTS = int(os.getenv("LOGIN_IP_MAX_ATTEMPTS", 30))
+    LOGIN_IP_WINDOW_SECONDS = float(os.getenv("LOGIN_IP_WINDOW_SECONDS", 60))
+    LOGIN_ACCOUNT_MAX_FAILURES = int(os.getenv("LOGIN_ACCOUNT_MAX_FAILURES", 5))
+    LOGIN_ACCOUNT_WINDOW_SECONDS = float(os.getenv("LOGIN_ACCOUNT_WINDOW_SECONDS", 300))
+    LOGIN_THROTTLE_MAX_KEYS = int(os.getenv("LOGIN_THROTTLE_MAX_KEYS", 100000))
+    # Jumlah reverse proxy tepercaya di depan API; IP client (untuk throttle
+    # login) diambil dari X-Forwarded-For. 0 = pakai alamat koneksi langsung
+    TRUSTED_PROXY_COUNT = int(os.getenv("TRUSTED_PROXY_COUNT", 0))
 
     # Environment
     FLASK_ENV = os.getenv("NODE_ENV", "development")  # Default: development
@@ -19,9 +38,114 @@ class Config:
     # CORS (Cross-Origin Resource Sharing)
     CORS_HEADERS = "Content-Type"
 
+    # Event transport: kafka | memory (satu proses) | file (log lokal di EVENT_LOG_DIR)
+    EVENT_TRANSPORT = os.getenv("EVENT_TRANSPORT", "kafka")
+    EVENT_LOG_DIR = os.getenv("EVENT_LOG_DIR", "eventlog")
+    EVENT_ENCODING = os.getenv("EVENT_ENCODING", "msgpack")  # json | msgpack
+
     # Kafka Configuration (if needed)
     KAFKA_BROKER = os.getenv("KAFKA_BROKER")
-    TOPIC_NAME = os.getenv("TOPIC_NAME")
+    TOPIC_NAME = os.getenv("TOPIC_NAME", "knife-detection-notifications")
+    KAFKA_LINGER_MS = int(os.getenv("KAFKA_LINGER_MS", 20))
+    KAFKA_BATCH_SIZE = int(os.getenv("KAFKA_BATCH_SIZE", 65536))  # bytes
+    KAFKA_COMPRESSION = os.getenv("KAFKA_COMPRESSION", "lz4")  # none | gzip | snappy | lz4 | zstd
+    KAFKA_ACKS = os.getenv("KAFKA_ACKS", "all")
+    KAFKA_QUEUE_MAX_MESSAGES = int(os.getenv("KAFKA_QUEUE_MAX_MESSAGES", 100000))
+    KAFKA_PRODUCE_BLOCK_SECONDS = float(os.getenv("KAFKA_PRODUCE_BLOCK_SECONDS", 1.0))
+    KAFKA_FLUSH_TIMEOUT_SECONDS = float(os.getenv("KAFKA_FLUSH_TIMEOUT_SECONDS", 10.0))
+    KAFKA_CONSUMER_BATCH_SIZE = int(os.getenv("KAFKA_CONSUMER_BATCH_SIZE", 100))
+    KAFKA_CONSUMER_WORKERS = int(os.getenv("KAFKA_CONSUMER_WORKERS", 8))
+    KAFKA_CONSUMER_POLL_TIMEOUT = float(os.getenv("KAFKA_CONSUMER_POLL_TIMEOUT", 1.0))
+    KAFKA_CONSUMER_MAX_RETRIES = int(os.getenv("KAFKA_CONSUMER_MAX_RETRIES", 3))
+    KAFKA_CONSUMER_RETRY_BACKOFF_SECONDS = float(os.getenv("KAFKA_CONSUMER_RETRY_BACKOFF_SECONDS", 0.5))
+    KAFKA_DEAD_LETTER_TOPIC = os.getenv("KAFKA_DEAD_LETTER_TOPIC")
+    # Tanpa dead letter topic: berapa kali pesan yang gagal diulang dari offset-nya sebelum dilewati
+    KAFKA_CONSUMER_MAX_REDELIVERIES = int(os.getenv("KAFKA_CONSUMER_MAX_REDELIVERIES", 5))
+
+    # Detection
+    DETECTION_MODEL_PATH = os.getenv("DETECTION_MODEL_PATH", "app/models/best.pt")
+    CCTV_REFRESH_INTERVAL = float(os.getenv("CCTV_REFRESH_INTERVAL", 30))
+    CAMERA_STOP_TIMEOUT_SECONDS = float(os.getenv("CAMERA_STOP_TIMEOUT_SECONDS", 10.0))
+    DETECTION_BACKEND = os.getenv("DETECTION_BACKEND", "onnx")  # torch | onnx
+    DETECTION_PRECISION = os.getenv("DETECTION_PRECISION", "fp32")  # fp32 | fp16 (butuh GPU CUDA) | int8
+    DETECTION_IMGSZ = int(os.getenv("DETECTION_IMGSZ", 640))
+    DETECTION_WARMUP_RUNS = int(os.getenv("DETECTION_WARMUP_RUNS", 2))
+    MODEL_CACHE_DIR = os.getenv("MODEL_CACHE_DIR", "app/models/cache")
+    DETECTION_MODEL_CONF = float(os.getenv("DETECTION_MODEL_CONF", 0.65))
+    DETECTION_CONF_THRESHOLD = float(os.getenv("DETECTION_CONF_THRESHOLD", 0.8))
+    DETECTION_CLASS_THRESHOLDS = os.getenv("DETECTION_CLASS_THRESHOLDS", "")  # contoh: "knife:0.8,gun:0.7"
+    DETECTION_MIN_SIZE = int(os.getenv("DETECTION_MIN_SIZE", 20))
+    DETECTION_MIN_ASPECT = float(os.getenv("DETECTION_MIN_ASPECT", 0.15))
+    DETECTION_MAX_ASPECT = float(os.getenv("DETECTION_MAX_ASPECT", 5.0))
+    INFERENCE_BATCH_SIZE = int(os.getenv("INFERENCE_BATCH_SIZE", 8))
+    INFERENCE_MAX_WAIT_MS = float(os.getenv("INFERENCE_MAX_WAIT_MS", 20))
+    INFERENCE_RESULT_TIMEOUT_SECONDS = float(os.getenv("INFERENCE_RESULT_TIMEOUT_SECONDS", 10.0))
+
+    # Motion Gate (pre-filter sebelum inference)
+    MOTION_GATE_ENABLED = os.getenv("MOTION_GATE_ENABLED", "true").lower() == "true"
+    MOTION_DOWNSCALE_WIDTH = int(os.getenv("MOTION_DOWNSCALE_WIDTH", 160))
+    MOTION_PIXEL_THRESHOLD = int(os.getenv("MOTION_PIXEL_THRESHOLD", 25))
+    MOTION_MIN_AREA = float(os.getenv("MOTION_MIN_AREA", 0.002))  # rasio piksel yang berubah
+    MOTION_MAX_STRIDE = int(os.getenv("MOTION_MAX_STRIDE", 128))
+    MOTION_KEEPALIVE_SECONDS = float(os.getenv("MOTION_KEEPALIVE_SECONDS", 5.0))
+
+    # Tracking & Incident
+    TRACK_IOU_THRESHOLD = float(os.getenv("TRACK_IOU_THRESHOLD", 0.3))
+    TRACK_MAX_AGE_SECONDS = float(os.getenv("TRACK_MAX_AGE_SECONDS", 2.0))
+    TRACK_MIN_HITS = int(os.getenv("TRACK_MIN_HITS", 2))
+    INCIDENT_MAX_EVIDENCE = int(os.getenv("INCIDENT_MAX_EVIDENCE", 5))
+    INCIDENT_EVIDENCE_WINDOW_SECONDS = float(os.getenv("INCIDENT_EVIDENCE_WINDOW_SECONDS", 3.0))
+    INCIDENT_DIVERSITY_IOU = float(os.getenv("INCIDENT_DIVERSITY_IOU", 0.7))
+    INCIDENT_MIN_INTERVAL_SECONDS = float(os.getenv("INCIDENT_MIN_INTERVAL_SECONDS", 0.5))
+    INCIDENT_QUIET_SECONDS = float(os.getenv("INCIDENT_QUIET_SECONDS", 10.0))
+    INCIDENT_COOLDOWN_SECONDS = float(os.getenv("INCIDENT_COOLDOWN_SECONDS", 60.0))
+
+    # Evidence Upload
+    UPLOAD_WORKERS = int(os.getenv("UPLOAD_WORKERS", 4))
+    UPLOAD_QUEUE_SIZE = int(os.getenv("UPLOAD_QUEUE_SIZE", 100))
+    UPLOAD_MAX_RETRIES = int(os.getenv("UPLOAD_MAX_RETRIES", 3))
+    UPLOAD_BACKOFF_SECONDS = float(os.getenv("UPLOAD_BACKOFF_SECONDS", 0.5))
+    UPLOAD_SPOOL_DIR = os.getenv("UPLOAD_SPOOL_DIR", "spool/uploads")
+
+    # Cache data referensi (CCTV -> owner, profil owner)
+    REFERENCE_CACHE_TTL_SECONDS = float(os.getenv("REFERENCE_CACHE_TTL_SECONDS", 300))
+    REFERENCE_CACHE_MAX_SIZE = int(os.getenv("REFERENCE_CACHE_MAX_SIZE", 10000))
+
+    # Report batching (detector)
+    REPORT_BATCH_SIZE = int(os.getenv("REPORT_BATCH_SIZE", 20))
+    REPORT_BATCH_MAX_WAIT_MS = float(os.getenv("REPORT_BATCH_MAX_WAIT_MS", 200))
+
+    # Pencarian polisi terdekat
+    POLICE_SEARCH_RADIUS_KM = float(os.getenv("POLICE_SEARCH_RADIUS_KM", 20))
+    POLICE_NOTIFY_MAX = int(os.getenv("POLICE_NOTIFY_MAX", 0))  # 0 = semua polisi dalam radius
+    GEO_INDEX_ENABLED = os.getenv("GEO_INDEX_ENABLED", "true").lower() == "true"
+    GEO_INDEX_CELL_DEG = float(os.getenv("GEO_INDEX_CELL_DEG", 0.1))
+    GEO_INDEX_REFRESH_SECONDS = float(os.getenv("GEO_INDEX_REFRESH_SECONDS", 30))
+    GEO_INDEX_FULL_REBUILD_SECONDS = float(os.getenv("GEO_INDEX_FULL_REBUILD_SECONDS", 600))
+
+    # Outbox relay (report -> event transport)
+    OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", 100))
+    OUTBOX_POLL_INTERVAL_SECONDS = float(os.getenv("OUTBOX_POLL_INTERVAL_SECONDS", 1.0))
+    OUTBOX_BACKOFF_SECONDS = float(os.getenv("OUTBOX_BACKOFF_SECONDS", 1.0))
+    OUTBOX_MAX_BACKOFF_SECONDS = float(os.getenv("OUTBOX_MAX_BACKOFF_SECONDS", 60.0))
+    # Lama klaim batch oleh satu relay; harus lebih lama dari KAFKA_FLUSH_TIMEOUT_SECONDS
+    OUTBOX_CLAIM_SECONDS = float(os.getenv("OUTBOX_CLAIM_SECONDS", 60.0))
+
+    # Notifikasi FCM
+    FIREBASE_CREDENTIALS_PATH = os.getenv("FIREBASE_CREDENTIALS_PATH", "app/keys/credentials.json")
+    FCM_MULTICAST_BATCH_SIZE = int(os.getenv("FCM_MULTICAST_BATCH_SIZE", 500))  # maks. 500
+    NOTIFY_DEDUP_TTL_SECONDS = float(os.getenv("NOTIFY_DEDUP_TTL_SECONDS", 3600))
+    NOTIFY_DEDUP_MAX_SIZE = int(os.getenv("NOTIFY_DEDUP_MAX_SIZE", 100000))
+
+    # Feed laporan (/api/v1/reports)
+    REPORTS_PAGE_SIZE = int(os.getenv("REPORTS_PAGE_SIZE", 20))
+    REPORTS_MAX_PAGE_SIZE = int(os.getenv("REPORTS_MAX_PAGE_SIZE", 100))
+
+    # Port /metrics untuk proses detector dan notifier (0 = nonaktif)
+    METRICS_PORT = int(os.getenv("METRICS_PORT", 9100))
+    METRICS_HOST = os.getenv("METRICS_HOST", "0.0.0.0")
+    # Bearer token untuk /metrics di port API; kosong = endpoint tidak didaftarkan
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
 
     # Application Port
     PORT = int(os.getenv("PORT", 8080))
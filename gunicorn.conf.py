@@ -0,0 +1,27 @@
+"""
+Konfigurasi gunicorn untuk peran API, dibaca otomatis dari direktori kerja.
+
+Setiap worker punya registry metrics sendiri. Dengan PROMETHEUS_MULTIPROC_DIR
+prometheus_client menulis nilai tiap worker ke file di direktori itu dan
+/metrics menggabungkannya. Variabel ini di-set di sini, sebelum worker
+meng-import app, sehingga peran detector/notifier tetap memakai mode satu proses.
+"""
+import os
+import shutil
+import tempfile
+
+multiproc_dir = os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "tangkapin-metrics")
+)
+
+
+def on_starting(server):
+    # File dari run sebelumnya akan ikut dijumlahkan, jadi dikosongkan saat start
+    shutil.rmtree(multiproc_dir, ignore_errors=True)
+    os.makedirs(multiproc_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
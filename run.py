@@ -1,47 +1,120 @@
+"""
+Entry point untuk setiap peran proses:
+
+    gunicorn run:app            API (produksi), tidak memuat model deteksi
+    python run.py api           API dengan server development Flask
+    python run.py detector      deteksi semua CCTV + relay outbox laporan
+    python run.py notifier      consumer event notifikasi -> FCM
+    python run.py all           semua peran dalam satu proses (development)
+
+Setiap peran hanya meng-import modul yang dibutuhkannya, sehingga worker API
+bisa diperbanyak tanpa ikut memuat YOLO/OpenCV/Supabase.
+"""
 from app import create_app
-import os
+import argparse
+import signal
+import sys
+import threading
 from dotenv import load_dotenv
-from app.utils.detection_knife import real_time_detection
-from app.controllers.notify_controller import process_kafka_event
 from app.helpers.logger import setup_logger
-import threading
+from config import Config
 
 load_dotenv()
 logger = setup_logger("App")
 app = create_app()
 
-MODELS = "app/models/best.pt"
-CCTV_IP = os.getenv("CCTV_IP")
+MODELS = Config.DETECTION_MODEL_PATH
 
-def start_real_time_detection():
+
+def start_metrics_server(port):
     """
-    Start real-time detection as a background process.
+    Peran tanpa server HTTP tetap mengekspos /metrics di port terpisah.
+    Hanya /metrics yang dilayani, bukan seluruh app Flask.
     """
-    try:
-        logger.info("Starting real-time detection...")
-        real_time_detection(MODELS, CCTV_IP)
-    except Exception as e:
-        logger.error(f"Error in real-time detection: {e}")
+    if not port:
+        return
+    from werkzeug.serving import make_server
+    from app.helpers.metrics import metrics_wsgi_app
+    server = make_server(Config.METRICS_HOST, port, metrics_wsgi_app, threaded=True)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    logger.info(f"Metrics available on :{port}/metrics")
+
 
-def start_kafka_consumer():
+def run_api(debug=None):
+    logger.info("Starting Flask server...")
+    debug = Config.DEBUG if debug is None else debug
+    app.run(host="0.0.0.0", port=Config.PORT, debug=debug, use_reloader=False)
+
+
+def run_detector():
     """
-    Start Kafka consumer as a background process.
+    Deteksi real-time untuk semua CCTV, ditambah relay outbox untuk laporan
+    yang dibuat detector. Saat berhenti, kamera di-join lebih dulu, lalu
+    upload dan laporan yang masih antri diselesaikan sebelum relay berhenti.
     """
+    from app.utils.detection_knife import stop_background_workers
+    from app.utils.detection_supervisor import DetectionSupervisor
+    from app.utils.outbox_relay import OutboxRelay
+
+    supervisor = DetectionSupervisor(MODELS)
+    relay = OutboxRelay(app).start()
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGTERM, lambda *_: supervisor.stop())
+
+    logger.info("Starting real-time detection...")
     try:
-        logger.info("Starting Kafka consumer...")
-        process_kafka_event()
-    except Exception as e:
-        logger.error(f"Error in Kafka consumer: {e}")
+        supervisor.run()
+    finally:
+        stop_background_workers()
+        relay.stop()
 
 
-if __name__ == "__main__":
-    # Thread untuk real-time detection
-    detection_thread = threading.Thread(target=start_real_time_detection, daemon=True)
-    detection_thread.start()
+def run_notifier():
+    from app.controllers.notify_controller import process_kafka_event
 
-    # Thread untuk Kafka consumer
-    kafka_thread = threading.Thread(target=start_kafka_consumer, daemon=True)
-    kafka_thread.start()
+    logger.info("Starting notification consumer...")
+    process_kafka_event(app)
 
-    logger.info("Starting Flask server...")
-    app.run(host="0.0.0.0", port=int(os.getenv("PORT", "8080")), debug=True)
+
+def run_all():
+    """
+    Semua peran dalam satu proses, untuk development lokal.
+    """
+    def _background(name, target):
+        def _run():
+            try:
+                target()
+            except Exception as e:
+                logger.error(f"Error in {name}: {e}")
+        threading.Thread(target=_run, name=name, daemon=True).start()
+
+    _background("detector", run_detector)
+    _background("notifier", run_notifier)
+    run_api()
+
+
+ROLES = {
+    "api": run_api,
+    "detector": run_detector,
+    "notifier": run_notifier,
+    "all": run_all,
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tangkapin server")
+    parser.add_argument("role", nargs="?", choices=sorted(ROLES), default="all")
+    parser.add_argument("--metrics-port", type=int, default=Config.METRICS_PORT,
+                        help="Port /metrics untuk peran detector dan notifier (0 = nonaktif)")
+    args = parser.parse_args(argv)
+
+    if args.role in ("detector", "notifier"):
+        start_metrics_server(args.metrics_port)
+        # SIGTERM -> SystemExit agar finally/atexit (flush Kafka, tutup consumer) tetap jalan
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+
+    ROLES[args.role]()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,12 @@
 from app import create_app, db
 from app.models import User, RoleEnum, CCTV
-from werkzeug.security import generate_password_hash
 import uuid
 
 def seed_users():
     with create_app().app_context():
         # Hash passwords
-        owner_password = generate_password_hash("@Test123")
-        police_password = generate_password_hash("@Test123")
+        owner_password = User.hash_password("@Test123")
+        police_password = User.hash_password("@Test123")
 
         # Create Owner user
         owner = User(